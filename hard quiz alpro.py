@@ -1,15 +1,584 @@
 import os
+import sys
+import csv
+import json
+import argparse
+import hashlib
 import time
+import platform
+import sqlite3
+import threading
+import tracemalloc
+import random
+import signal
+import heapq
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import gcd
+from bisect import bisect_right
+from collections import OrderedDict, deque
+import numpy as np
 from colorama import init, Fore, Back, Style
 
+try:
+    import msvcrt  # Windows: baca tombol tanpa menunggu Enter
+except ImportError:
+    msvcrt = None
+    import select
+    import termios
+    import tty
+
 # Initialize colorama
 init(autoreset=True)
 
+ACTIVITY_SEARCH_MODES = ("combination", "permutation")
+MANDATORY_TYPES = ("destination", "hotel", "transportation")
+TOP_K_DEFAULT = 5
+ACTIVITY_CACHE_SIZE = 4096
+ANYTIME_TIME_LIMIT = 10.0  # Detik, untuk mesin anytime di menu
+SEARCH_STAGES = MANDATORY_TYPES + ("activity",)
+PRUNE_REASONS = ("budget", "bound", "seed", "top_k", "compatibility")
+PROGRESS_INTERVAL = 10000  # Node di antara dua panggilan on_progress
+CATALOG_DB_PATH = "katalog_perjalanan.db"
+SERVICE_PORT = 8765
+SERVICE_CACHE_SIZE = 256  # Hasil rencana yang disimpan di LRU layanan HTTP
+SERVICE_MAX_PENDING = 64  # Permintaan yang sedang dihitung sebelum layanan menolak (HTTP 503)
+SERVICE_LATENCY_WINDOW = 1000  # Jumlah latensi terakhir untuk persentil
+SERVICE_THROUGHPUT_WINDOW = 60.0  # Detik
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def feasible_triples(budget, destinations, hotels, transportations):
+    """
+    Return every (dest, hotel, transport, cost, value) triple that fits the
+    budget, in destination-major catalog order.
+    """
+    catalog = TripCatalog.from_dicts(destinations, hotels, transportations, {})
+    return catalog.triple_tuples(*catalog.feasible_triples(budget))
+
+
+def pareto_triples(budget, destinations, hotels, transportations):
+    """
+    Return the feasible triples sorted by cost with strictly increasing value.
+    
+    A triple that costs at least as much as another and is worth no more can
+    never be part of a better plan, so only this frontier needs searching.
+    """
+    catalog = TripCatalog.from_dicts(destinations, hotels, transportations, {})
+    return catalog.triple_tuples(*catalog.pareto_triples(budget))
+
+
+def item_availability(data):
+    """
+    Destinations an item is restricted to, as a tuple, or None when it is
+    available everywhere. Hotels and transportations may carry an optional
+    ``"destinations": [...]`` list in the catalog dict.
+    """
+    allowed = data.get("destinations")
+    return tuple(allowed) if allowed else None
+
+
+def available_at(data, dest):
+    """True if the hotel/transportation ``data`` can be combined with destination ``dest``."""
+    allowed = data.get("destinations")
+    return not allowed or dest in allowed
+
+
+def _covers(wider, narrower):
+    """True if availability ``wider`` includes every destination of ``narrower`` (None = everywhere)."""
+    if wider is None:
+        return True
+    return narrower is not None and set(narrower) <= set(wider)
+
+
+def mandatory_items(dest, hotel, transport, destinations, hotels, transportations):
+    """Return the plan tuples of one (destination, hotel, transportation) triple."""
+    return [
+        ("destination", dest, destinations[dest]["cost"], destinations[dest]["value"]),
+        ("hotel", hotel, hotels[hotel]["cost"], hotels[hotel]["value"]),
+        ("transportation", transport, transportations[transport]["cost"], transportations[transport]["value"]),
+    ]
+
+
+class CatalogCategory:
+    """
+    One catalog category as parallel int64 ``costs``/``values`` arrays and
+    a ``names`` table, in the insertion order of the original dict.
+    ``available`` holds each item's destination restriction (see
+    item_availability), None for unrestricted items.
+    """
+    
+    def __init__(self, names, costs, values, available=None):
+        self.names = list(names)
+        self.costs = np.asarray(costs, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.int64)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.available = list(available) if available is not None else [None] * len(self.names)
+        self.restricted = any(allowed is not None for allowed in self.available)
+    
+    @classmethod
+    def from_dict(cls, items):
+        """Build from the ``{name: {"cost": ..., "value": ..., ["destinations": [...]]}}`` format."""
+        return cls(items.keys(),
+                   [data["cost"] for data in items.values()],
+                   [data["value"] for data in items.values()],
+                   [item_availability(data) for data in items.values()])
+    
+    def to_dict(self):
+        """Convert back to the ``{name: {"cost": ..., "value": ...}}`` format."""
+        items = {}
+        for name, cost, value, allowed in zip(self.names, self.costs.tolist(), self.values.tolist(), self.available):
+            items[name] = {"cost": cost, "value": value}
+            if allowed is not None:
+                items[name]["destinations"] = list(allowed)
+        return items
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def take(self, indices):
+        """Return a new category with only the items at ``indices`` (in that order)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        return CatalogCategory([self.names[i] for i in indices.tolist()], self.costs[indices], self.values[indices],
+                               [self.available[i] for i in indices.tolist()])
+    
+    def density(self):
+        """Value per IDR of every item (``inf`` for free items)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            density = self.values / self.costs
+        return np.where(self.costs > 0, density, np.inf)
+    
+    def order_by_density(self):
+        """Indices sorted by density, best first (catalog order on ties)."""
+        return np.argsort(-self.density(), kind="stable")
+    
+    def non_dominated(self, coverage=None):
+        """
+        Indices of the items no other item beats on both cost and value,
+        sorted by cost. Only meaningful for single-choice (mandatory)
+        categories. An item with the same value only beats items after it
+        in the catalog, so the search still returns the same plan among
+        equal-value alternatives; for identical items the first one is kept.
+        
+        With destination restrictions an item only dominates items whose
+        availability it covers; ``coverage`` overrides the availability
+        used for that test (one set per item, see preprocess_catalog).
+        """
+        if not self.names:
+            return np.zeros(0, dtype=np.int64)
+        # Peringkat unik per item: nilai lebih tinggi, lalu posisi katalog lebih awal
+        positions = np.arange(len(self.names))
+        rank = np.empty(len(self.names), dtype=np.int64)
+        rank[np.lexsort((-positions, self.values))] = positions
+        order = np.lexsort((-rank, self.costs))
+        
+        coverage = self.available if coverage is None else coverage
+        if any(allowed is not None for allowed in coverage):
+            # Urut biaya naik: kandidat pendominasi item i selalu sudah diperiksa sebelumnya
+            kept = []
+            ranks = rank.tolist()
+            for i in order.tolist():
+                if not any(ranks[j] > ranks[i] and _covers(coverage[j], coverage[i]) for j in kept):
+                    kept.append(i)
+            return np.array(kept, dtype=np.int64)
+        
+        ranks = rank[order]
+        best_before = np.maximum.accumulate(np.concatenate(([-1], ranks[:-1])))
+        return order[ranks > best_before]
+
+
+class TripCatalog:
+    """
+    Compact, array-backed form of the four catalog dicts used by the menu.
+    
+    Engines get indexed access through the CatalogCategory arrays (use
+    ``tolist()`` for scalar access inside Python loops) and vectorized
+    precomputation such as mandatory_totals().
+    """
+    
+    def __init__(self, destinations, hotels, transportations, activities):
+        self.destinations = destinations
+        self.hotels = hotels
+        self.transportations = transportations
+        self.activities = activities
+        self._compatible = None
+    
+    @classmethod
+    def from_dicts(cls, destinations, hotels, transportations, activities):
+        return cls(CatalogCategory.from_dict(destinations), CatalogCategory.from_dict(hotels),
+                   CatalogCategory.from_dict(transportations), CatalogCategory.from_dict(activities))
+    
+    def to_dicts(self):
+        """Return ``(destinations, hotels, transportations, activities)`` dicts."""
+        return tuple(category.to_dict() for category in self.categories())
+    
+    def mandatory(self):
+        """Return the destination, hotel and transportation categories."""
+        return self.destinations, self.hotels, self.transportations
+    
+    def categories(self):
+        return self.destinations, self.hotels, self.transportations, self.activities
+    
+    def restricted(self):
+        """True if any hotel or transportation is tied to specific destinations."""
+        return self.hotels.restricted or self.transportations.restricted
+    
+    def compatible_indices(self):
+        """
+        Adjacency index of the compatibility constraints, built once:
+        ``(hotels_for, transports_for)``, each a list with, per destination
+        index, the int64 array of compatible item indices in catalog order.
+        """
+        if self._compatible is None:
+            self._compatible = tuple(self._adjacency(category) for category in (self.hotels,
+                                                                                 self.transportations))
+        return self._compatible
+    
+    def _adjacency(self, category):
+        everywhere = []
+        restricted = [[] for _ in self.destinations.names]
+        for index, allowed in enumerate(category.available):
+            if allowed is None:
+                everywhere.append(index)
+            else:
+                for dest in allowed:
+                    dest_index = self.destinations.index.get(dest)
+                    if dest_index is not None:
+                        restricted[dest_index].append(index)
+        return [np.array(sorted(set(everywhere).union(items)), dtype=np.int64) for items in restricted]
+    
+    def mandatory_totals(self):
+        """
+        Summed cost and value of every (destination, hotel, transportation)
+        triple, as two arrays of shape (destinations, hotels, transportations).
+        """
+        costs = (self.destinations.costs[:, None, None] + self.hotels.costs[None, :, None]
+                 + self.transportations.costs[None, None, :])
+        values = (self.destinations.values[:, None, None] + self.hotels.values[None, :, None]
+                  + self.transportations.values[None, None, :])
+        return costs, values
+    
+    def feasible_triples(self, budget):
+        """
+        Every triple within ``budget``, evaluated at once by broadcasting.
+        
+        Returns arrays ``(dest_index, hotel_index, transport_index, costs,
+        values)`` in destination-major catalog order. With compatibility
+        constraints only the compatible hotels and transportations of each
+        destination are combined, so the full cube is never built.
+        """
+        if self.restricted():
+            return self._compatible_triples(budget)
+        
+        costs, values = self.mandatory_totals()
+        dest_index, hotel_index, transport_index = np.nonzero(costs <= budget)
+        return (dest_index, hotel_index, transport_index,
+                costs[dest_index, hotel_index, transport_index], values[dest_index, hotel_index, transport_index])
+    
+    def _compatible_triples(self, budget):
+        hotels_for, transports_for = self.compatible_indices()
+        parts = []
+        for dest_index, (hotel_index, transport_index) in enumerate(zip(hotels_for, transports_for)):
+            if not len(hotel_index) or not len(transport_index):
+                continue
+            costs = (self.destinations.costs[dest_index] + self.hotels.costs[hotel_index][:, None]
+                     + self.transportations.costs[transport_index][None, :])
+            rows, columns = np.nonzero(costs <= budget)
+            if not len(rows):
+                continue
+            values = (self.destinations.values[dest_index] + self.hotels.values[hotel_index][:, None]
+                      + self.transportations.values[transport_index][None, :])
+            parts.append((np.full(len(rows), dest_index, dtype=np.int64), hotel_index[rows], transport_index[columns],
+                          costs[rows, columns], values[rows, columns]))
+        
+        if not parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, empty, empty
+        return tuple(np.concatenate(column) for column in zip(*parts))
+    
+    def pareto_triples(self, budget):
+        """
+        Like feasible_triples, minus the dominated triples, sorted by cost
+        (largest remaining budget first). Values strictly increase along the
+        result, so every remaining budget in it is unique.
+        """
+        dest_index, hotel_index, transport_index, costs, values = self.feasible_triples(budget)
+        if not len(costs):
+            return dest_index, hotel_index, transport_index, costs, values
+        
+        order = np.lexsort((np.arange(len(costs)), -values, costs))
+        sorted_values = values[order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = sorted_values[1:] > np.maximum.accumulate(sorted_values)[:-1]
+        order = order[keep]
+        return dest_index[order], hotel_index[order], transport_index[order], costs[order], values[order]
+    
+    def triple_tuples(self, dest_index, hotel_index, transport_index, costs, values):
+        """Convert triple arrays to (dest, hotel, transport, cost, value) tuples."""
+        return list(zip([self.destinations.names[i] for i in dest_index.tolist()],
+                        [self.hotels.names[i] for i in hotel_index.tolist()],
+                        [self.transportations.names[i] for i in transport_index.tolist()],
+                        costs.tolist(), values.tolist()))
+
+
+def preprocess_catalog(budget, destinations, hotels, transportations, activities, dominance=True):
+    """
+    Shrink a catalog before searching it, without changing the returned plan.
+    
+    - Mandatory items that cannot fit even with the cheapest item of the
+      other two categories are removed.
+    - With ``dominance``, mandatory items that are dominated (see
+      CatalogCategory.non_dominated; the dominating item must also be
+      compatible with at least the same items) are removed. Top-K search
+      needs the dominated items for its alternative plans and turns it off.
+    - Activities that cost more than the budget left after the cheapest
+      triple are removed.
+    - Activities with identical cost and value are counted as duplicates;
+      the combination search expands each group of them only once.
+    
+    Items keep their catalog order.
+    
+    Returns ``((destinations, hotels, transportations, activities), report)``
+    where ``report`` maps each category to ``(before, after)`` item counts
+    and holds the duplicate count and the search space (triples times
+    distinct activity subsets) before and after.
+    """
+    catalog = TripCatalog.from_dicts(destinations, hotels, transportations, activities)
+    mandatory = catalog.mandatory()
+    
+    # Dengan batasan kompatibilitas, destinasi hanya mendominasi destinasi lain
+    # jika semua hotel dan transportasi yang cocok untuk destinasi itu juga cocok untuknya
+    coverage = [None, None, None]
+    if catalog.restricted():
+        hotels_for, transports_for = catalog.compatible_indices()
+        coverage[0] = [frozenset(("hotel", i) for i in hotel_index.tolist())
+                       | frozenset(("transportation", i) for i in transport_index.tolist())
+                       for hotel_index, transport_index in zip(hotels_for, transports_for)]
+    
+    cheapest = [int(category.costs.min()) if len(category) else 0 for category in mandatory]
+    reduced = []
+    for position, category in enumerate(mandatory):
+        limit = budget - (sum(cheapest) - cheapest[position])
+        if dominance:
+            keep = category.non_dominated(coverage[position])
+        else:
+            keep = np.arange(len(category))
+        keep = np.sort(keep[category.costs[keep] <= limit])
+        reduced.append(category.take(keep))
+    
+    # Aktivitas harus muat bersama triple termurah yang tersisa
+    if all(len(category) for category in reduced):
+        capacity = budget - sum(int(category.costs.min()) for category in reduced)
+    else:
+        capacity = -1
+    
+    activity_items = catalog.activities
+    feasible = np.flatnonzero(activity_items.costs <= capacity)
+    if len(feasible):
+        pairs = np.stack([activity_items.costs[feasible], activity_items.values[feasible]], axis=1)
+        counts = np.unique(pairs, axis=0, return_counts=True)[1]
+        reduced_activities = activity_items.take(feasible)
+        duplicates = len(feasible) - len(counts)
+        subsets_after = 1
+        for count in counts.tolist():
+            subsets_after *= count + 1
+    else:
+        reduced_activities = activity_items.take(feasible)
+        duplicates = 0
+        subsets_after = 1
+    
+    report = {}
+    for key, before, after in zip(("destinations", "hotels", "transportations", "activities"),
+                                  catalog.categories(), reduced + [reduced_activities]):
+        report[key] = (len(before), len(after))
+    report["duplicate_activities"] = duplicates
+    report["search_space_before"] = (len(catalog.destinations) * len(catalog.hotels)
+                                     * len(catalog.transportations) * 2 ** len(catalog.activities))
+    report["search_space_after"] = len(reduced[0]) * len(reduced[1]) * len(reduced[2]) * subsets_after
+    
+    reduced_catalog = TripCatalog(reduced[0], reduced[1], reduced[2], reduced_activities)
+    return reduced_catalog.to_dicts(), report
+
+
+class ActivityCache:
+    """
+    LRU cache of solved activity subproblems, shared between solves.
+    
+    Keys are ``(catalog version, search mode, remaining budget)``. The
+    version only changes when the activity catalog itself changes, so
+    re-planning after editing the budget or a mandatory category reuses
+    earlier results.
+    """
+    
+    def __init__(self, maxsize=ACTIVITY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.next_version = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def version(self, activities):
+        """Return the version number of an activity catalog (same contents, same number)."""
+        fingerprint = tuple((name, data["cost"], data["value"]) for name, data in activities.items())
+        if fingerprint not in self.versions:
+            # Versi lama yang sudah dilupakan cukup hilang lewat LRU
+            if len(self.versions) >= 64:
+                self.versions.clear()
+            self.versions[fingerprint] = self.next_version
+            self.next_version += 1
+        return self.versions[fingerprint]
+    
+    def get(self, key):
+        """Return the cached result for ``key`` or None, counting hits and misses."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+    
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+    
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
+
+
+# Cache bersama untuk semua optimasi yang dijalankan dari menu utama
+ACTIVITY_CACHE = ActivityCache()
+
+
+class SearchStats:
+    """
+    Counters of one instrumented TravelPlanner search.
+    
+    ``nodes`` and ``stage_time`` are keyed by the category a node chooses
+    (SEARCH_STAGES); stage time excludes the time spent in child nodes.
+    ``prunes`` counts cut nodes by reason: over budget, bound not better
+    than the search's own incumbent, bound below the greedy seed / shared
+    incumbent, or not better than the full top-K heap. ``incumbents`` holds
+    ``(seconds since start, value, nodes visited)`` per improvement.
+    """
+    
+    def __init__(self):
+        self.nodes = dict.fromkeys(SEARCH_STAGES, 0)
+        self.stage_time = dict.fromkeys(SEARCH_STAGES, 0.0)
+        self.prunes = dict.fromkeys(PRUNE_REASONS, 0)
+        self.incumbents = []
+        self.max_depth = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self.child_time = []  # Waktu anak yang terkumpul, satu entri per node yang sedang aktif
+    
+    def start(self):
+        self.__init__()
+        self.started_at = time.perf_counter()
+    
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.started_at
+    
+    @property
+    def total_nodes(self):
+        return sum(self.nodes.values())
+    
+    def record_prune(self, reason):
+        self.prunes[reason] += 1
+    
+    def record_incumbent(self, value, nodes_visited):
+        self.incumbents.append((time.perf_counter() - self.started_at, value, nodes_visited))
+    
+    def as_dict(self):
+        return {
+            "nodes": dict(self.nodes),
+            "stage_time": dict(self.stage_time),
+            "prunes": dict(self.prunes),
+            "incumbents": list(self.incumbents),
+            "max_depth": self.max_depth,
+            "elapsed": self.elapsed,
+        }
+
+
+class _SearchInterrupted(Exception):
+    """Raised inside backtrack when the anytime time or node limit runs out."""
+
+
 class TravelPlanner:
-    def __init__(self, budget):
+    label = "Backtracking"
+    
+    def __init__(self, budget, activity_search="combination", branch_and_bound=False, workers=1, top_k=None,
+                 iterative=False, activity_cache=None, time_limit=None, node_limit=None, on_improve=None,
+                 instrument=False, on_progress=None, progress_interval=PROGRESS_INTERVAL):
+        if activity_search not in ACTIVITY_SEARCH_MODES:
+            raise ValueError(f"Mode pencarian aktivitas tidak dikenal: {activity_search}")
+        if top_k and workers > 1:
+            raise ValueError("Mode top-K belum didukung bersama pencarian paralel")
+        if activity_cache is not None and (top_k or workers > 1):
+            raise ValueError("Cache aktivitas tidak bisa dipakai bersama mode top-K atau paralel")
+        limited = time_limit is not None or node_limit is not None
+        if limited and (workers > 1 or activity_cache is not None):
+            raise ValueError("Batas waktu/node hanya didukung pada pencarian serial")
+        if (instrument or on_progress) and (workers > 1 or activity_cache is not None):
+            raise ValueError("Instrumentasi hanya didukung pada pencarian serial")
+        
         self.best_plan = None
         self.max_value = 0
         self.total_budget = budget  # Budget dari input
+        self.activity_search = activity_search  # "combination" atau "permutation"
+        self.branch_and_bound = branch_and_bound
+        self.workers = workers  # > 1: cari tiap triple wajib di proses terpisah
+        self.iterative = iterative  # True: pakai backtrack_iterative (tanpa rekursi)
+        self.activity_cache = activity_cache  # ActivityCache untuk sub-masalah aktivitas
+        self.seed_plan = None
+        self.seed_value = 0
+        self.shared_incumbent = None  # multiprocessing.Value milik proses worker
+        self.top_k = top_k  # Simpan K rencana terbaik yang berbeda
+        self.top_plans = []  # Min-heap (value, -urutan, plan, kunci)
+        self.top_keys = set()
+        self.top_counter = 0
+        self.catalog = None  # TripCatalog dari pencarian terakhir
+        self.activity_names = []
+        self.activity_costs = []
+        self.activity_values = []
+        self.previous_duplicates = []  # Indeks aktivitas identik sebelumnya (-1 jika tidak ada)
+        self.mandatory_levels = [[] for _ in MANDATORY_TYPES]  # Tuple rencana per kategori wajib
+        self.destination_index = None  # Indeks destinasi pada cabang rekursif yang sedang aktif
+        self.compatible = None  # True jika katalog punya batasan kompatibilitas (lihat _load_catalog)
+        self.chosen_activities = set()  # Indeks aktivitas terpilih (permutation, atau combination dengan duplikat)
+        self.has_duplicates = False
+        self.nodes_visited = 0
+        self.nodes_pruned = 0
+        # Batas waktu (detik) atau jumlah node; AnytimePlanner menambahkan branch and bound
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.limited = limited
+        self.on_improve = on_improve  # Callback(progress) setiap rencana yang lebih baik ditemukan
+        self.deadline = None
+        self.started_at = None
+        self.root_bound = None
+        self.reported_value = 0
+        self.interrupted = False
+        self.proven_optimal = False
+        # Instrumentasi: None berarti mati dan jalur pencarian tidak berubah sama sekali
+        self.stats = None
+        self.on_progress = on_progress  # Callback(stats) tiap progress_interval node
+        self.progress_interval = progress_interval
+        self.cancelled = False  # Diset oleh cancel(), biasanya dari thread lain
+        self.active_subproblem = None  # Sub-pencarian cache aktivitas yang sedang berjalan
+        if instrument or on_progress:
+            self.stats = SearchStats()
+            # Menimpa backtrack di level instance agar setiap panggilan rekursif ikut tercatat
+            self.backtrack = self._backtrack_instrumented
         
     def plan_trip_to_china(self, destinations, hotels, transportations, activities):
         """
@@ -22,83 +591,1466 @@ class TravelPlanner:
             activities: Dictionary of activities with costs and values
         """
         selected_items = []
-        self.backtrack(destinations, hotels, transportations, activities, selected_items, 0, 0)
+        self._load_catalog(TripCatalog.from_dicts(destinations, hotels, transportations, activities))
+        self.nodes_visited = 0
+        self.nodes_pruned = 0
+        self.top_plans = []
+        self.top_keys = set()
+        self.top_counter = 0
+        self.started_at = time.perf_counter()
+        self.deadline = None if self.time_limit is None else self.started_at + self.time_limit
+        self.reported_value = 0
+        self.interrupted = False
+        self.proven_optimal = False
+        if self.stats is not None:
+            self.stats.start()
+        
+        if self.branch_and_bound or self.workers > 1:
+            self._prepare_bounds()
+            self.root_bound = self._upper_bound(0, 0, 0, 0)
+            self._seed_greedy_plan(destinations, hotels, transportations, activities)
+            if self.seed_value > 0:
+                self._report_improvement(self.seed_value, self.seed_plan)
+        
+        try:
+            if self.workers > 1:
+                self._plan_parallel(destinations, hotels, transportations, activities)
+            elif self.activity_cache is not None:
+                self._plan_memoized(destinations, hotels, transportations, activities)
+            elif self.iterative and self.stats is None:
+                self.backtrack_iterative(destinations, hotels, transportations, activities)
+            else:
+                self.backtrack(selected_items, 0, 0)
+        except _SearchInterrupted:
+            self.interrupted = True
+        
+        if self.stats is not None:
+            self.stats.stop()
+            if self.on_progress is not None:
+                self.on_progress(self.stats)
+        
+        if self.seed_value > self.max_value:
+            self.max_value = self.seed_value
+            self.best_plan = self.seed_plan
+        # Berhenti karena batas tetap optimal jika nilainya sudah mencapai batas atas
+        self.proven_optimal = (not self.interrupted
+                               or self.root_bound is not None and self.max_value >= self.root_bound)
+        return self.best_plan
+    
+    def cancel(self):
+        """
+        Ask a running search (e.g. in another thread) to stop; it returns
+        the best plan found so far, with ``interrupted`` set.
+        """
+        self.cancelled = True
+        self.limited = True
+        subproblem = self.active_subproblem
+        if subproblem is not None:
+            subproblem.cancel()
+    
+    def _backtrack_instrumented(self, selected, current_cost, current_value, start=0):
+        """
+        backtrack wrapper used when instrumentation is on: counts the node
+        per stage, tracks depth and exclusive stage time, and calls
+        on_progress. The iterative engine visits the same nodes in the same
+        order, so instrumented runs always go through this recursive path.
+        """
+        stats = self.stats
+        depth = len(selected)
+        stage = SEARCH_STAGES[min(depth, len(MANDATORY_TYPES))]
+        stats.nodes[stage] += 1
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+        if self.on_progress is not None and not stats.total_nodes % self.progress_interval:
+            stats.elapsed = time.perf_counter() - stats.started_at
+            self.on_progress(stats)
+        
+        stats.child_time.append(0.0)
+        began = time.perf_counter()
+        try:
+            TravelPlanner.backtrack(self, selected, current_cost, current_value, start)
+        finally:
+            elapsed = time.perf_counter() - began
+            stats.stage_time[stage] += elapsed - stats.child_time.pop()
+            if stats.child_time:
+                stats.child_time[-1] += elapsed
+    
+    def _limit_reached(self):
+        """True once cancelled or the anytime node or time limit is used up (the clock is read every 1024 nodes)."""
+        if self.cancelled:
+            return True
+        if self.node_limit is not None and self.nodes_visited >= self.node_limit:
+            return True
+        return (self.deadline is not None and not self.nodes_visited & 1023
+                and time.perf_counter() >= self.deadline)
+    
+    def optimality_gap(self, value=None):
+        """
+        Relative gap between ``value`` (default: max_value) and the best
+        known upper bound: the root bound during the search, max_value
+        itself once the search has proven its plan optimal.
+        """
+        value = self.max_value if value is None else value
+        bound = self.max_value if self.proven_optimal else self.root_bound
+        if not bound or bound <= 0:
+            return 0.0
+        return max(bound - value, 0) / bound
+    
+    def _report_improvement(self, value, plan):
+        """Pass a strictly better plan to on_improve as a progress dict."""
+        if self.on_improve is None or value <= self.reported_value:
+            return
+        self.reported_value = value
+        self.on_improve({
+            "value": value,
+            "plan": list(plan),
+            "upper_bound": self.root_bound,
+            "gap": self.optimality_gap(value),
+            "nodes": self.nodes_visited,
+            "elapsed": time.perf_counter() - self.started_at,
+        })
+    
+    def _plan_parallel(self, destinations, hotels, transportations, activities):
+        """
+        Solve the activity subproblem of every feasible mandatory triple in a
+        ProcessPoolExecutor. Workers prune against a shared incumbent; the
+        winner is the best value with the lowest triple index, which is the
+        same plan the serial search records.
+        
+        cancel() is checked between results: triples not yet started are
+        dropped, but the ones already running in the workers finish first.
+        """
+        triples = feasible_triples(self.total_budget, destinations, hotels, transportations)
+        shared = multiprocessing.Value("d", self.seed_value)
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_parallel_worker,
+                                 initargs=(shared, activities)) as executor:
+            futures = [
+                executor.submit(_solve_triple_activities, self.total_budget, self.activity_search, self.iterative,
+                                mandatory_items(dest, hotel, transport, destinations, hotels, transportations))
+                for dest, hotel, transport, _, _ in triples
+            ]
+            
+            for future in futures:
+                if self.cancelled:
+                    # Triple yang belum mulai dibatalkan, yang sedang berjalan dibiarkan selesai
+                    for pending in futures:
+                        pending.cancel()
+                    self.interrupted = True
+                    break
+                value, plan, visited, pruned = future.result()
+                self.nodes_visited += visited
+                self.nodes_pruned += pruned
+                if value > self.max_value:
+                    self.max_value = value
+                    self.best_plan = plan
+    
+    def _plan_memoized(self, destinations, hotels, transportations, activities):
+        """
+        Solve every feasible triple's activity subproblem through the
+        activity cache. Triples with the same remaining budget share one
+        entry; the winner is picked exactly as in the serial search.
+        """
+        version = self.activity_cache.version(activities)
+        for dest, hotel, transport, cost, value in feasible_triples(self.total_budget, destinations, hotels,
+                                                                    transportations):
+            if self.cancelled:
+                self.interrupted = True
+                break
+            prefix = mandatory_items(dest, hotel, transport, destinations, hotels, transportations)
+            key = (version, self.activity_search, self.total_budget - cost)
+            result = self.activity_cache.get(key)
+            
+            if result is None:
+                subproblem = TravelPlanner(self.total_budget, self.activity_search, branch_and_bound=True,
+                                           iterative=self.iterative)
+                self.active_subproblem = subproblem
+                if self.cancelled:
+                    subproblem.cancel()
+                plan = subproblem.solve_activities(prefix, activities)
+                self.active_subproblem = None
+                self.nodes_visited += subproblem.nodes_visited
+                self.nodes_pruned += subproblem.nodes_pruned
+                if subproblem.interrupted:
+                    # Hasil sub-pencarian yang terpotong tidak boleh masuk cache
+                    self.interrupted = True
+                    if plan and subproblem.max_value > self.max_value:
+                        self.max_value = subproblem.max_value
+                        self.best_plan = plan
+                    break
+                
+                if plan:
+                    result = (subproblem.max_value - value, plan[len(prefix):])
+                else:
+                    result = (0, [])
+                self.activity_cache.put(key, result)
+            
+            activity_value, activity_items = result
+            if value + activity_value > self.max_value:
+                self.max_value = value + activity_value
+                self.best_plan = prefix + activity_items
+    
+    def solve_activities(self, prefix, activities):
+        """
+        Run the activity part of the search on top of a fixed mandatory
+        ``prefix`` (destination, hotel, transportation plan tuples).
+        """
+        self._load_catalog(TripCatalog.from_dicts({}, {}, {}, activities))
+        self._prepare_bounds()
+        
+        if self.iterative and self.stats is None:
+            self.backtrack_iterative({}, {}, {}, activities, prefix)
+        else:
+            cost = sum(item[2] for item in prefix)
+            value = sum(item[3] for item in prefix)
+            try:
+                self.backtrack(list(prefix), cost, value)
+            except _SearchInterrupted:
+                self.interrupted = True
         return self.best_plan
     
-    def backtrack(self, destinations, hotels, transportations, activities, selected, current_cost, current_value):
+    def ranked_plans(self):
+        """Return the top-K plans as ``(value, plan)``, best first (ties by discovery order)."""
+        return [(value, plan) for value, _, plan, _ in sorted(self.top_plans, reverse=True)]
+    
+    def _record_top_plan(self, selected, value):
+        """Offer a complete plan to the bounded top-K min-heap."""
+        full = len(self.top_plans) >= self.top_k
+        if full and value <= self.top_plans[0][0]:
+            return
+        
+        # Mode permutation bisa mengunjungi himpunan yang sama berkali-kali
+        key = None
+        if self.activity_search == "permutation":
+            key = (tuple(item[1] for item in selected[:len(MANDATORY_TYPES)]),
+                   frozenset(item[1] for item in selected[len(MANDATORY_TYPES):]))
+            if key in self.top_keys:
+                return
+            self.top_keys.add(key)
+        
+        self.top_counter += 1
+        entry = (value, -self.top_counter, selected.copy(), key)
+        if full:
+            evicted = heapq.heapreplace(self.top_plans, entry)
+            self.top_keys.discard(evicted[3])
+        else:
+            heapq.heappush(self.top_plans, entry)
+    
+    def _publish_incumbent(self, value):
+        with self.shared_incumbent.get_lock():
+            if value > self.shared_incumbent.value:
+                self.shared_incumbent.value = value
+    
+    def _load_catalog(self, catalog):
+        """
+        Switch the search to ``catalog`` and cache its columns as lists: the
+        activity columns and, per mandatory category, the plan tuples in
+        catalog order.
+        """
+        self.catalog = catalog
+        self.mandatory_levels = [
+            list(zip([item_type] * len(category), category.names, category.costs.tolist(), category.values.tolist()))
+            for item_type, category in zip(MANDATORY_TYPES, catalog.mandatory())
+        ]
+        self.activity_names = catalog.activities.names
+        self.activity_costs = catalog.activities.costs.tolist()
+        self.activity_values = catalog.activities.values.tolist()
+        last_seen = {}
+        self.previous_duplicates = []
+        for index, pair in enumerate(zip(self.activity_costs, self.activity_values)):
+            self.previous_duplicates.append(last_seen.get(pair, -1))
+            last_seen[pair] = index
+        self.has_duplicates = len(last_seen) < len(self.activity_names)
+        self.chosen_activities = set()
+        
+        # Indeks adjacency kompatibilitas untuk forward checking (None jika tanpa batasan)
+        self.compatible = None
+        if catalog.restricted():
+            hotels_for, transports_for = catalog.compatible_indices()
+            hotel_costs = catalog.hotels.costs.tolist()
+            transport_costs = catalog.transportations.costs.tolist()
+            self.compatible_hotels = [index.tolist() for index in hotels_for]
+            self.compatible_transports = [index.tolist() for index in transports_for]
+            # Per destinasi: tuple hotel/transportasi yang cocok, dalam urutan katalog
+            self.compatible_levels = [None,
+                                      [[self.mandatory_levels[1][i] for i in items] for items in self.compatible_hotels],
+                                      [[self.mandatory_levels[2][i] for i in items]
+                                       for items in self.compatible_transports]]
+            self.min_hotel_cost = [min((hotel_costs[i] for i in items), default=float("inf"))
+                                   for items in self.compatible_hotels]
+            self.min_transport_cost = [min((transport_costs[i] for i in items), default=float("inf"))
+                                       for items in self.compatible_transports]
+            self.compatible = True
+    
+    def _prepare_bounds(self):
+        """Precompute the per-stage mandatory bounds and the activity density order."""
+        categories = self.catalog.mandatory()
+        
+        # Indeks = jumlah kategori wajib yang sudah dipilih
+        self._mandatory_value_bound = [0] * (len(categories) + 1)
+        self._mandatory_cost_floor = [0] * (len(categories) + 1)
+        for stage in range(len(categories) - 1, -1, -1):
+            category = categories[stage]
+            self._mandatory_value_bound[stage] = (self._mandatory_value_bound[stage + 1]
+                                                  + (int(category.values.max()) if len(category) else 0))
+            self._mandatory_cost_floor[stage] = (self._mandatory_cost_floor[stage + 1]
+                                                 + (int(category.costs.min()) if len(category) else 0))
+        
+        activities = self.catalog.activities
+        density = activities.density().tolist()
+        self._activities_by_density = [
+            (density[index], index, self.activity_costs[index], self.activity_values[index])
+            for index in activities.order_by_density().tolist()
+        ]
+    
+    def _upper_bound(self, stage, current_cost, current_value, start):
+        """
+        Optimistic value of any plan reachable from this node: the best value
+        of every mandatory category still open plus a fractional knapsack
+        over the activities that can still be added.
+        """
+        room = self.total_budget - current_cost - self._mandatory_cost_floor[stage]
+        if room < 0:
+            return -1
+        
+        bound = current_value + self._mandatory_value_bound[stage]
+        combination = self.activity_search == "combination"
+        
+        for _, index, cost, value in self._activities_by_density:
+            if index < start if combination else index in self.chosen_activities:
+                continue
+            
+            if cost <= room:
+                room -= cost
+                bound += value
+            else:
+                bound += value * room / cost
+                break
+        
+        return bound
+    
+    def _seed_greedy_plan(self, destinations, hotels, transportations, activities):
+        """
+        Seed the incumbent with a greedy plan so pruning starts immediately.
+        
+        The seed value only cuts subtrees that are strictly worse, so ties
+        are still resolved by the search itself and the final plan is the
+        same as without branch and bound.
+        """
+        triples = feasible_triples(self.total_budget, destinations, hotels, transportations)
+        if not triples:
+            return
+        
+        # Kandidat: triple dengan nilai tertinggi dan triple termurah
+        candidates = {max(triples, key=lambda t: (t[4], -t[3])), min(triples, key=lambda t: (t[3], -t[4]))}
+        for dest, hotel, transport, cost, value in sorted(candidates):
+            plan = mandatory_items(dest, hotel, transport, destinations, hotels, transportations)
+            
+            chosen = []
+            for _, index, activity_cost, activity_value in self._activities_by_density:
+                if cost + activity_cost <= self.total_budget:
+                    cost += activity_cost
+                    value += activity_value
+                    chosen.append(index)
+            
+            for index in sorted(chosen):
+                plan.append(("activity", self.activity_names[index], self.activity_costs[index],
+                             self.activity_values[index]))
+            
+            if value > self.seed_value:
+                self.seed_value = value
+                self.seed_plan = plan
+    
+    def backtrack(self, selected, current_cost, current_value, start=0):
         """
         Backtracking function to find optimal combination.
+        
+        In "combination" mode only activities after the last chosen one
+        (by catalog order) are tried, so every activity subset is visited
+        exactly once; an activity with an identical one (same cost and
+        value) earlier in the catalog is only tried once that earlier copy
+        is chosen, so every multiset of duplicates is visited only once.
+        "permutation" mode visits every ordering of the same subset and is
+        kept for comparison.
+        
+        With branch_and_bound enabled a node is cut (and counted in
+        nodes_pruned) as soon as its upper bound cannot beat max_value.
+        
+        With a time or node limit the search unwinds via _SearchInterrupted
+        when the limit runs out; plan_trip_to_china keeps the best plan so far.
+        
+        With compatibility constraints (see TripCatalog.compatible_indices)
+        only the hotels and transportations compatible with the chosen
+        destination are expanded, and a destination or hotel is skipped when
+        no compatible item of the remaining categories still fits.
         """
+        if self.limited and self._limit_reached():
+            raise _SearchInterrupted
+        self.nodes_visited += 1
+        
         # Check if we've exceeded budget
         if current_cost > self.total_budget:
+            if self.stats is not None:
+                self.stats.record_prune("budget")
             return
         
-        # Check if we have a complete valid solution
-        has_destination = any(item[0] == "destination" for item in selected)
-        has_hotel = any(item[0] == "hotel" for item in selected)
-        has_transport = any(item[0] == "transportation" for item in selected)
+        # Item wajib selalu ditambahkan berurutan (destinasi, hotel, transportasi),
+        # jadi tahap pencarian cukup dibaca dari panjang selected
+        stage = min(len(selected), len(MANDATORY_TYPES))
+        
+        if self.branch_and_bound:
+            bound = self._upper_bound(stage, current_cost, current_value, start)
+            if self.top_k:
+                # Nilai minimum heap menjadi ambang pemotongan setelah heap penuh
+                cut = len(self.top_plans) >= self.top_k and bound <= self.top_plans[0][0]
+            else:
+                floor = self.seed_value
+                if self.shared_incumbent is not None:
+                    floor = max(floor, self.shared_incumbent.value)
+                cut = bound <= self.max_value or bound < floor
+            
+            if cut:
+                self.nodes_pruned += 1
+                if self.stats is not None:
+                    self.stats.record_prune("top_k" if self.top_k else "bound" if bound <= self.max_value else "seed")
+                return
         
-        if has_destination and has_hotel and has_transport:
+        if stage == len(MANDATORY_TYPES):
+            if self.top_k:
+                self._record_top_plan(selected, current_value)
+            
             # Valid complete solution - check if it's the best so far
             if current_value > self.max_value:
                 self.max_value = current_value
                 self.best_plan = selected.copy()
+                if self.shared_incumbent is not None:
+                    self._publish_incumbent(current_value)
+                if self.on_improve is not None:
+                    self._report_improvement(current_value, selected)
+                if self.stats is not None:
+                    self.stats.record_incumbent(current_value, self.nodes_visited)
         
         # Try adding a destination
-        if not has_destination:
-            for dest in destinations:
-                dest_cost = destinations[dest]["cost"]
-                dest_value = destinations[dest]["value"]
+        if stage == 0:
+            for index, item in enumerate(self.mandatory_levels[0]):
+                dest_cost = item[2]
+                dest_value = item[3]
                 
-                selected.append(("destination", dest, dest_cost, dest_value))
-                self.backtrack(destinations, hotels, transportations, activities, 
-                               selected, current_cost + dest_cost, current_value + dest_value)
+                # Forward checking: destinasi tanpa hotel/transportasi cocok yang masih muat tidak dicoba
+                if (self.compatible is not None
+                        and current_cost + dest_cost + self.min_hotel_cost[index] + self.min_transport_cost[index]
+                        > self.total_budget):
+                    if self.stats is not None:
+                        self.stats.record_prune("compatibility")
+                    continue
+                
+                self.destination_index = index
+                selected.append(item)
+                self.backtrack(selected, current_cost + dest_cost, current_value + dest_value)
                 selected.pop()
         
         # Try adding a hotel
-        elif not has_hotel:
-            for hotel in hotels:
-                hotel_cost = hotels[hotel]["cost"]
-                hotel_value = hotels[hotel]["value"]
+        elif stage == 1:
+            candidates = self.mandatory_levels[1]
+            if self.compatible is not None:
+                dest_index = self.destination_index
+                candidates = self.compatible_levels[1][dest_index]
+            
+            for item in candidates:
+                hotel_cost = item[2]
+                hotel_value = item[3]
                 
-                selected.append(("hotel", hotel, hotel_cost, hotel_value))
-                self.backtrack(destinations, hotels, transportations, activities, 
-                               selected, current_cost + hotel_cost, current_value + hotel_value)
+                if (self.compatible is not None
+                        and current_cost + hotel_cost + self.min_transport_cost[dest_index] > self.total_budget):
+                    if self.stats is not None:
+                        self.stats.record_prune("compatibility")
+                    continue
+                
+                selected.append(item)
+                self.backtrack(selected, current_cost + hotel_cost, current_value + hotel_value)
                 selected.pop()
         
         # Try adding transportation
-        elif not has_transport:
-            for transport in transportations:
-                transport_cost = transportations[transport]["cost"]
-                transport_value = transportations[transport]["value"]
+        elif stage == 2:
+            candidates = self.mandatory_levels[2]
+            if self.compatible is not None:
+                candidates = self.compatible_levels[2][self.destination_index]
+            
+            for item in candidates:
+                transport_cost = item[2]
+                transport_value = item[3]
                 
-                selected.append(("transportation", transport, transport_cost, transport_value))
-                self.backtrack(destinations, hotels, transportations, activities, 
-                               selected, current_cost + transport_cost, current_value + transport_value)
+                selected.append(item)
+                self.backtrack(selected, current_cost + transport_cost, current_value + transport_value)
                 selected.pop()
         
-        # Try adding activities (optional)
+        # Try adding activities (optional)
+        else:
+            # Try each possible activity
+            combination = self.activity_search == "combination"
+            skip_repeats = combination and not self.top_k and self.has_duplicates
+            track = not combination or skip_repeats
+            first = start if combination else 0
+            
+            for index in range(first, len(self.activity_names)):
+                activity = self.activity_names[index]
+                
+                # Skip if we already selected this activity
+                if not combination and index in self.chosen_activities:
+                    continue
+                
+                # Salinan duplikat hanya dipilih setelah salinan sebelumnya: tiap multiset sekali saja
+                if skip_repeats:
+                    previous = self.previous_duplicates[index]
+                    if previous >= 0 and previous not in self.chosen_activities:
+                        continue
+                    
+                activity_cost = self.activity_costs[index]
+                activity_value = self.activity_values[index]
+                
+                # Check if adding this would exceed budget
+                if current_cost + activity_cost <= self.total_budget:
+                    selected.append(("activity", activity, activity_cost, activity_value))
+                    if track:
+                        self.chosen_activities.add(index)
+                    
+                    self.backtrack(selected, current_cost + activity_cost, current_value + activity_value,
+                                   index + 1)
+                    
+                    if track:
+                        self.chosen_activities.discard(index)
+                    selected.pop()
+            
+            # Not adding any more activities is already covered by the
+            # complete-solution check at the top of this call
+    
+    def backtrack_iterative(self, destinations, hotels, transportations, activities, prefix=()):
+        """
+        Explicit-stack version of backtrack.
+        
+        Visits the same nodes in the same order and records the same plans
+        and counters, but keeps the search state in preallocated per-depth
+        lists that are undone on pop, so there is no recursion limit and no
+        per-node call overhead. ``prefix`` optionally fixes the first plan
+        items (see solve_activities). A time or node limit simply ends the
+        loop and sets ``interrupted``.
+        """
+        levels = self.mandatory_levels
+        compatible = self.compatible is not None
+        if compatible:
+            compatible_levels = self.compatible_levels
+            min_hotel_cost = self.min_hotel_cost
+            min_transport_cost = self.min_transport_cost
+        activity_items = list(zip(["activity"] * len(self.activity_names), self.activity_names,
+                                  self.activity_costs, self.activity_values))
+        activity_count = len(activity_items)
+        mandatory = len(MANDATORY_TYPES)
+        
+        # Satu slot per kedalaman: item terpilih, indeksnya, anak berikutnya, biaya dan nilai kumulatif
+        root = len(prefix)
+        size = mandatory + activity_count + 1
+        path = list(prefix) + [None] * (size - root)
+        chosen = [-1] * size
+        next_child = [0] * size
+        costs = [0] * size
+        values = [0] * size
+        costs[root] = sum(item[2] for item in prefix)
+        values[root] = sum(item[3] for item in prefix)
+        
+        combination = self.activity_search == "combination"
+        skip_repeats = combination and not self.top_k and self.has_duplicates
+        track = not combination or skip_repeats
+        previous_duplicates = self.previous_duplicates
+        chosen_activities = self.chosen_activities
+        budget = self.total_budget
+        depth = root
+        entering = True
+        
+        while depth >= root:
+            if entering:
+                entering = False
+                if self.limited and self._limit_reached():
+                    self.interrupted = True
+                    break
+                self.nodes_visited += 1
+                current_cost = costs[depth]
+                current_value = values[depth]
+                stage = depth if depth < mandatory else mandatory
+                start = chosen[depth - 1] + 1 if depth > mandatory else 0
+                next_child[depth] = start if combination and stage == mandatory else 0
+                
+                cut = current_cost > budget
+                if not cut and self.branch_and_bound:
+                    bound = self._upper_bound(stage, current_cost, current_value, start)
+                    if self.top_k:
+                        cut = len(self.top_plans) >= self.top_k and bound <= self.top_plans[0][0]
+                    else:
+                        floor = self.seed_value
+                        if self.shared_incumbent is not None:
+                            floor = max(floor, self.shared_incumbent.value)
+                        cut = bound <= self.max_value or bound < floor
+                    if cut:
+                        self.nodes_pruned += 1
+                
+                if cut:
+                    depth -= 1
+                    if depth >= mandatory and track:
+                        chosen_activities.discard(chosen[depth])
+                    continue
+                
+                if stage == mandatory:
+                    if self.top_k and (len(self.top_plans) < self.top_k or current_value > self.top_plans[0][0]):
+                        self._record_top_plan(path[:depth], current_value)
+                    
+                    if current_value > self.max_value:
+                        self.max_value = current_value
+                        self.best_plan = path[:depth]
+                        if self.shared_incumbent is not None:
+                            self._publish_incumbent(current_value)
+                        if self.on_improve is not None:
+                            self._report_improvement(current_value, self.best_plan)
+            
+            # Cari anak berikutnya pada kedalaman ini
+            index = next_child[depth]
+            if depth < mandatory:
+                items = levels[depth]
+                if compatible:
+                    if depth:
+                        items = compatible_levels[depth][chosen[0]]
+                    # Forward checking untuk destinasi dan hotel saja, sama seperti pada backtrack;
+                    # transportasi yang melebihi budget tetap dikunjungi lalu dipotong
+                    while depth < 2 and index < len(items):
+                        if depth == 0:
+                            floor = min_hotel_cost[index] + min_transport_cost[index]
+                        else:
+                            floor = min_transport_cost[chosen[0]]
+                        if costs[depth] + items[index][2] + floor <= budget:
+                            break
+                        index += 1
+                if index >= len(items):
+                    index = -1
+            else:
+                items = activity_items
+                while index < activity_count:
+                    if ((combination or index not in chosen_activities)
+                            and not (skip_repeats and previous_duplicates[index] >= 0
+                                     and previous_duplicates[index] not in chosen_activities)
+                            and costs[depth] + items[index][2] <= budget):
+                        break
+                    index += 1
+                if index >= activity_count:
+                    index = -1
+            
+            if index < 0:
+                # Semua anak sudah dicoba: mundur dan batalkan pilihan induk
+                depth -= 1
+                if depth >= mandatory and track:
+                    chosen_activities.discard(chosen[depth])
+                continue
+            
+            item = items[index]
+            next_child[depth] = index + 1
+            chosen[depth] = index
+            path[depth] = item
+            if depth >= mandatory and track:
+                chosen_activities.add(index)
+            costs[depth + 1] = costs[depth] + item[2]
+            values[depth + 1] = values[depth] + item[3]
+            depth += 1
+            entering = True
+
+
+_worker_incumbent = None
+_worker_activities = None
+
+
+def _init_parallel_worker(shared_incumbent, activities):
+    """Store the shared incumbent and the activity catalog in a worker process."""
+    global _worker_incumbent, _worker_activities
+    _worker_incumbent = shared_incumbent
+    _worker_activities = activities
+
+
+def _solve_triple_activities(budget, activity_search, iterative, prefix):
+    """Worker task: best activities for one mandatory triple."""
+    planner = TravelPlanner(budget, activity_search, branch_and_bound=True, iterative=iterative)
+    planner.shared_incumbent = _worker_incumbent
+    plan = planner.solve_activities(prefix, _worker_activities)
+    return planner.max_value, plan, planner.nodes_visited, planner.nodes_pruned
+
+
+class BranchAndBoundPlanner(TravelPlanner):
+    """TravelPlanner with branch-and-bound pruning switched on."""
+    label = "Branch and Bound"
+    
+    def __init__(self, budget, activity_search="combination"):
+        super().__init__(budget, activity_search, branch_and_bound=True)
+
+
+class TopKPlanner(TravelPlanner):
+    """Branch-and-bound TravelPlanner that also keeps the K best alternative plans."""
+    label = f"Top-{TOP_K_DEFAULT} Rencana Alternatif"
+    
+    def __init__(self, budget, activity_search="combination", top_k=TOP_K_DEFAULT):
+        super().__init__(budget, activity_search, branch_and_bound=True, top_k=top_k)
+
+
+class AnytimePlanner(TravelPlanner):
+    """
+    Branch-and-bound TravelPlanner that stops after ``time_limit`` seconds
+    (or ``node_limit`` nodes) with the best plan found so far. Check
+    ``proven_optimal`` and ``optimality_gap()`` afterwards.
+    """
+    label = f"Anytime (maks. {ANYTIME_TIME_LIMIT:g} detik)"
+    
+    def __init__(self, budget, activity_search="combination", time_limit=ANYTIME_TIME_LIMIT, node_limit=None,
+                 on_improve=None):
+        super().__init__(budget, activity_search, branch_and_bound=True, iterative=True, time_limit=time_limit,
+                         node_limit=node_limit, on_improve=on_improve)
+
+
+class MemoizedPlanner(TravelPlanner):
+    """TravelPlanner that reuses activity subproblems through the shared ACTIVITY_CACHE."""
+    label = "Backtracking + Cache Aktivitas"
+    
+    def __init__(self, budget, activity_search="combination", activity_cache=None):
+        super().__init__(budget, activity_search, iterative=True,
+                         activity_cache=ACTIVITY_CACHE if activity_cache is None else activity_cache)
+
+
+class ParallelPlanner(TravelPlanner):
+    """TravelPlanner that spreads the mandatory triples over all CPU cores."""
+    label = "Backtracking Paralel (multi-core)"
+    
+    def __init__(self, budget, activity_search="combination", workers=None):
+        super().__init__(budget, activity_search, workers=workers or os.cpu_count() or 1)
+
+
+class ActivityKnapsack:
+    """
+    0/1 knapsack table over the activity catalog, built once and queried
+    for any remaining budget up to ``capacity``.
+    
+    Costs are divided by their GCD first. If the reduced capacity axis is
+    still longer than the total satisfaction value, the table is indexed by
+    value (minimum cost per value) instead, so it stays small even for IDR
+    prices like 5,000,000 with a 1,000 IDR granularity.
+    """
+    
+    def __init__(self, activities, capacity):
+        self.names = []
+        self.costs = []
+        self.values = []
+        for name, data in activities.items():
+            if 0 <= data["cost"] <= capacity:
+                self.names.append(name)
+                self.costs.append(data["cost"])
+                self.values.append(data["value"])
+        
+        self.capacity = max(capacity, 0)
+        self.unit = 0
+        for cost in self.costs:
+            self.unit = gcd(self.unit, cost)
+        self.unit = self.unit or 1
+        
+        total_value = sum(self.values)
+        if self.capacity // self.unit <= total_value:
+            self.by_value = False
+            self._build_by_cost(self.capacity // self.unit)
+        else:
+            self.by_value = True
+            self._build_by_value(total_value)
+    
+    def _build_by_cost(self, size):
+        # best[c] = nilai terbaik dengan total biaya <= c (dalam satuan unit)
+        best = [0] * (size + 1)
+        self.keep = []
+        for cost, value in zip(self.costs, self.values):
+            weight = cost // self.unit
+            keep = bytearray(size + 1)
+            for c in range(size, weight - 1, -1):
+                candidate = best[c - weight] + value
+                if candidate > best[c]:
+                    best[c] = candidate
+                    keep[c] = 1
+            self.keep.append(keep)
+        self.best = best
+        self.best_array = np.array(best, dtype=np.int64)
+    
+    def _build_by_value(self, size):
+        # min_cost[v] = biaya minimum untuk mencapai nilai tepat v
+        unreachable = self.capacity + 1
+        min_cost = [unreachable] * (size + 1)
+        min_cost[0] = 0
+        self.keep = []
+        for cost, value in zip(self.costs, self.values):
+            keep = bytearray(size + 1)
+            for v in range(size, value - 1, -1):
+                candidate = min_cost[v - value] + cost
+                if candidate < min_cost[v]:
+                    min_cost[v] = candidate
+                    keep[v] = 1
+            self.keep.append(keep)
+        
+        # Biaya efektif (minimum suffix) naik monoton, sehingga query bisa pakai bisect
+        self.frontier = min_cost[:]
+        for v in range(size - 1, -1, -1):
+            if self.frontier[v + 1] < self.frontier[v]:
+                self.frontier[v] = self.frontier[v + 1]
+        self.frontier_array = np.array(self.frontier, dtype=np.int64)
+    
+    def append(self, name, cost, value):
+        """
+        Add one activity as a new last row without rebuilding the table.
+        
+        Only possible for cost-indexed tables whose unit divides ``cost``;
+        returns False otherwise (the caller then builds a new table).
+        Activities that do not fit ``capacity`` are ignored, as in __init__.
+        """
+        if not 0 <= cost <= self.capacity:
+            return True
+        if self.by_value or cost % self.unit:
+            return False
+        
+        self.names.append(name)
+        self.costs.append(cost)
+        self.values.append(value)
+        
+        best = self.best
+        weight = cost // self.unit
+        keep = bytearray(len(best))
+        for c in range(len(best) - 1, weight - 1, -1):
+            candidate = best[c - weight] + value
+            if candidate > best[c]:
+                best[c] = candidate
+                keep[c] = 1
+        self.keep.append(keep)
+        self.best_array = np.array(best, dtype=np.int64)
+        return True
+    
+    def best_value(self, remaining):
+        """Return the best activity value that fits in ``remaining``."""
+        return self._state(remaining)[0]
+    
+    def best_values(self, remaining):
+        """Vectorized best_value for an array of non-negative remaining budgets."""
+        remaining = np.minimum(np.asarray(remaining, dtype=np.int64), self.capacity)
+        if self.by_value:
+            return np.searchsorted(self.frontier_array, remaining, side="right") - 1
+        return self.best_array[remaining // self.unit]
+    
+    def best_selection(self, remaining):
+        """Return ``(value, indices)`` of the best activities for ``remaining``."""
+        value, state = self._state(remaining)
+        if state is None:
+            return value, []
+        
+        chosen = []
+        for index in range(len(self.keep) - 1, -1, -1):
+            if self.keep[index][state]:
+                chosen.append(index)
+                state -= self.values[index] if self.by_value else self.costs[index] // self.unit
+        chosen.reverse()
+        return value, chosen
+    
+    def _state(self, remaining):
+        if remaining < 0:
+            return None, None
+        remaining = min(remaining, self.capacity)
+        if self.by_value:
+            value = bisect_right(self.frontier, remaining) - 1
+            return value, value
+        state = remaining // self.unit
+        return self.best[state], state
+
+
+class BatchPlanner:
+    """
+    Answer many budgets against one catalog.
+    
+    The mandatory triples are reduced to the Pareto-dominant ones (a triple
+    that costs more and is worth no more than another can never win) and a
+    single ActivityKnapsack is built for the largest budget, so each extra
+    budget only costs a few table lookups.
+    """
+    
+    def __init__(self, max_budget, destinations, hotels, transportations, activities):
+        self.destinations = destinations
+        self.hotels = hotels
+        self.transportations = transportations
+        self.max_budget = max_budget
+        
+        catalog = TripCatalog.from_dicts(destinations, hotels, transportations, {})
+        triple_arrays = catalog.pareto_triples(max_budget)
+        self.triples = catalog.triple_tuples(*triple_arrays)
+        self.triple_costs = triple_arrays[3]
+        self.triple_values = triple_arrays[4]
+        
+        capacity = max_budget - int(self.triple_costs[0]) if self.triples else 0
+        self.knapsack = ActivityKnapsack(activities, capacity)
+    
+    def plan(self, budget):
+        """Return ``(best_plan, max_value)`` for one budget (``(None, 0)`` if nothing fits)."""
+        if budget > self.max_budget:
+            raise ValueError(f"Budget {budget:,} melebihi budget maksimum {self.max_budget:,}")
+        
+        # Semua triple yang muat dievaluasi sekaligus terhadap tabel knapsack
+        count = int(np.searchsorted(self.triple_costs, budget, side="right"))
+        if not count:
+            return None, 0
+        totals = self.triple_values[:count] + self.knapsack.best_values(budget - self.triple_costs[:count])
+        best = int(np.argmax(totals))
+        max_value = int(totals[best])
+        if max_value <= 0:
+            return None, 0
+        
+        dest, hotel, transport, cost, _ = self.triples[best]
+        plan = mandatory_items(dest, hotel, transport, self.destinations, self.hotels, self.transportations)
+        _, chosen = self.knapsack.best_selection(budget - cost)
+        for index in chosen:
+            plan.append(("activity", self.knapsack.names[index], self.knapsack.costs[index],
+                         self.knapsack.values[index]))
+        return plan, max_value
+
+
+def plan_for_budgets(budgets, destinations, hotels, transportations, activities):
+    """
+    Plan the same catalog for many budgets without the interactive menu.
+    
+    Returns a list of ``(best_plan, max_value)`` in the order of ``budgets``;
+    plans use the usual (item_type, name, cost, value) format.
+    """
+    if not budgets:
+        return []
+    
+    batch = BatchPlanner(max(budgets), destinations, hotels, transportations, activities)
+    return [batch.plan(budget) for budget in budgets]
+
+
+class DynamicProgrammingPlanner:
+    """
+    Exact solver for large activity catalogs.
+    
+    Every (destination, hotel, transportation) triple that fits the budget
+    is combined with the best activities for its remaining budget, taken
+    from one shared ActivityKnapsack table (see BatchPlanner).
+    """
+    label = "Dynamic Programming (knapsack)"
+    
+    def __init__(self, budget):
+        self.best_plan = None
+        self.max_value = 0
+        self.total_budget = budget
+    
+    def plan_trip_to_china(self, destinations, hotels, transportations, activities):
+        """Plan an optimal trip; same arguments and result as TravelPlanner."""
+        batch = BatchPlanner(self.total_budget, destinations, hotels, transportations, activities)
+        plan, value = batch.plan(self.total_budget)
+        
+        if value > self.max_value:
+            self.max_value = value
+            self.best_plan = plan
+        return self.best_plan
+
+
+def subset_frontier(items, capacity):
+    """
+    Enumerate the subsets of ``items`` (list of (cost, value)) that fit
+    ``capacity`` and keep only the Pareto-dominant ones.
+    
+    Dominated subsets are dropped after every item, so the working list
+    never grows past the frontier itself. Returns parallel lists
+    (costs, values, masks) sorted by cost, with strictly increasing values,
+    so the best subset for any budget is found with one bisect on ``costs``.
+    """
+    frontier = [(0, 0, 0)]
+    for bit, (cost, value) in enumerate(items):
+        if cost > capacity:
+            continue
+        flag = 1 << bit
+        shifted = [(c + cost, v + value, mask | flag) for c, v, mask in frontier if c + cost <= capacity]
+        
+        merged = heapq.merge(frontier, shifted, key=lambda entry: (entry[0], -entry[1]))
+        frontier = []
+        for entry in merged:
+            if not frontier or entry[1] > frontier[-1][1]:
+                frontier.append(entry)
+    
+    costs = [entry[0] for entry in frontier]
+    values = [entry[1] for entry in frontier]
+    masks = [entry[2] for entry in frontier]
+    return costs, values, masks
+
+
+class MeetInTheMiddlePlanner:
+    """
+    Exact solver for mid-sized activity catalogs (about 30-40 activities)
+    with budgets too large for the DP table.
+    
+    The activities are split in two halves whose subset sums are reduced to
+    Pareto frontiers; every frontier entry of the first half is combined
+    with the best entry of the second half by binary search on the budget
+    left after each mandatory triple.
+    """
+    label = "Meet in the Middle"
+    
+    def __init__(self, budget):
+        self.best_plan = None
+        self.max_value = 0
+        self.total_budget = budget
+    
+    def plan_trip_to_china(self, destinations, hotels, transportations, activities):
+        """Plan an optimal trip; same arguments and result as TravelPlanner."""
+        triples = pareto_triples(self.total_budget, destinations, hotels, transportations)
+        if not triples:
+            return self.best_plan
+        
+        capacity = self.total_budget - triples[0][3]
+        names = list(activities)
+        items = [(activities[name]["cost"], activities[name]["value"]) for name in names]
+        half = len(items) // 2
+        left_costs, left_values, left_masks = subset_frontier(items[:half], capacity)
+        right_costs, right_values, right_masks = subset_frontier(items[half:], capacity)
+        
+        best = None
+        for triple in triples:
+            remaining = self.total_budget - triple[3]
+            for i, left_cost in enumerate(left_costs):
+                if left_cost > remaining:
+                    break
+                j = bisect_right(right_costs, remaining - left_cost) - 1
+                value = triple[4] + left_values[i] + right_values[j]
+                if value > self.max_value:
+                    self.max_value = value
+                    best = (triple, left_masks[i], right_masks[j])
+        
+        if best is None:
+            return self.best_plan
+        
+        (dest, hotel, transport, _, _), left_mask, right_mask = best
+        plan = mandatory_items(dest, hotel, transport, destinations, hotels, transportations)
+        mask = left_mask | (right_mask << half)
+        for index, name in enumerate(names):
+            if mask >> index & 1:
+                plan.append(("activity", name, activities[name]["cost"], activities[name]["value"]))
+        
+        self.best_plan = plan
+        return self.best_plan
+
+
+class PlanFrontier:
+    """
+    Every non-dominated (cost, value) complete plan of a catalog.
+    
+    Built in one pass: the activity subsets and the mandatory triples are
+    each reduced to their Pareto frontiers, combined, and pruned for
+    dominance again. Points are kept in cost-sorted ``array`` columns, so
+    ``best(budget)`` is a single bisect.
+    """
+    
+    def __init__(self, destinations, hotels, transportations, activities, max_budget=None):
+        self.destinations = destinations
+        self.hotels = hotels
+        self.transportations = transportations
+        self.activities = activities
+        self.activity_names = list(activities)
+        
+        limit = float("inf") if max_budget is None else max_budget
+        self.triples = pareto_triples(limit, destinations, hotels, transportations)
+        
+        capacity = limit - self.triples[0][3] if self.triples else 0
+        items = [(activities[name]["cost"], activities[name]["value"]) for name in self.activity_names]
+        activity_costs, activity_values, self.activity_masks = subset_frontier(items, capacity)
+        
+        candidates = []
+        for triple_index, (_, _, _, triple_cost, triple_value) in enumerate(self.triples):
+            for activity_index, activity_cost in enumerate(activity_costs):
+                if triple_cost + activity_cost > limit:
+                    break
+                candidates.append((triple_cost + activity_cost, -(triple_value + activity_values[activity_index]),
+                                   triple_index, activity_index))
+        candidates.sort()
+        
+        self.costs = array("q")
+        self.values = array("q")
+        self.triple_index = array("l")
+        self.activity_index = array("l")
+        for cost, negative_value, triple_index, activity_index in candidates:
+            if not self.values or -negative_value > self.values[-1]:
+                self.costs.append(cost)
+                self.values.append(-negative_value)
+                self.triple_index.append(triple_index)
+                self.activity_index.append(activity_index)
+    
+    def __len__(self):
+        return len(self.costs)
+    
+    def points(self):
+        """Return the frontier as a list of (cost, value) pairs, cheapest first."""
+        return list(zip(self.costs, self.values))
+    
+    def plan_at(self, index):
+        """Return the plan tuples of frontier point ``index``."""
+        dest, hotel, transport, _, _ = self.triples[self.triple_index[index]]
+        plan = mandatory_items(dest, hotel, transport, self.destinations, self.hotels, self.transportations)
+        mask = self.activity_masks[self.activity_index[index]]
+        for bit, name in enumerate(self.activity_names):
+            if mask >> bit & 1:
+                plan.append(("activity", name, self.activities[name]["cost"], self.activities[name]["value"]))
+        return plan
+    
+    def best(self, budget):
+        """Return ``(best_plan, max_value)`` for ``budget`` in O(log n)."""
+        index = bisect_right(self.costs, budget) - 1
+        if index < 0:
+            return None, 0
+        return self.plan_at(index), self.values[index]
+
+
+class IncrementalPlanState:
+    """
+    Search state kept between re-plans of the same catalog.
+    
+    Holds the mandatory value and total value of every feasible triple and
+    one ActivityKnapsack for the budget. On the next ``plan`` call only the
+    items that changed since the previous call are re-evaluated: a changed
+    destination, hotel or transportation touches only the triples that
+    contain it, and a new activity appends one row to the knapsack table.
+    Changing the budget rebuilds everything.
+    
+    The previous result stays available in ``best_plan`` / ``max_value``;
+    ``stale`` lists, per category, the item names edited since it was
+    computed (see ``mark_stale``).
+    """
+    
+    def __init__(self):
+        self.budget = None
+        self.snapshot = {item_type: {} for item_type in MANDATORY_TYPES + ("activity",)}
+        self.stale = {item_type: set() for item_type in self.snapshot}
+        self.triples = {}  # (dest, hotel, transport) -> (biaya wajib, nilai wajib)
+        self.totals = {}  # (dest, hotel, transport) -> nilai total termasuk aktivitas
+        self.knapsack = None
+        self.best_plan = None
+        self.max_value = 0
+        self.last_update = None
+    
+    def mark_stale(self, item_type, name):
+        """Flag the current result as outdated because ``name`` of ``item_type`` changed."""
+        self.stale[item_type].add(name)
+    
+    def is_stale(self):
+        return any(self.stale.values())
+    
+    def plan(self, budget, destinations, hotels, transportations, activities):
+        """Bring the state up to date with the catalog and return ``(best_plan, max_value)``."""
+        categories = dict(zip(self.snapshot, (destinations, hotels, transportations, activities)))
+        full = budget != self.budget
+        if full:
+            self.budget = budget
+            self.triples = {}
+            self.totals = {}
+            self.knapsack = None
+        
+        changed = {item_type: self._diff(item_type, items, full) for item_type, items in categories.items()}
+        
+        # Knapsack aktivitas: tambah baris baru jika bisa, selain itu bangun ulang
+        knapsack_mode = "dipakai ulang"
+        if self.knapsack is None or changed["activity"]:
+            previous = self.snapshot["activity"]
+            appendable = self.knapsack is not None and not any(name in previous for name in changed["activity"])
+            if appendable:
+                for name in activities:
+                    if name in changed["activity"]:
+                        data = activities[name]
+                        if not self.knapsack.append(name, data["cost"], data["value"]):
+                            appendable = False
+                            break
+            if appendable:
+                knapsack_mode = "baris ditambah"
+            else:
+                self.knapsack = ActivityKnapsack(activities, budget)
+                knapsack_mode = "dibangun ulang"
+        
+        if full:
+            catalog = TripCatalog.from_dicts(destinations, hotels, transportations, {})
+            for dest, hotel, transport, cost, value in catalog.triple_tuples(*catalog.feasible_triples(budget)):
+                self.triples[dest, hotel, transport] = (cost, value)
+            fresh = list(self.triples)
         else:
-            # Try each possible activity
-            for activity in activities:
-                # Skip if we already selected this activity
-                if any(item[0] == "activity" and item[1] == activity for item in selected):
+            fresh = self._update_triples(changed, destinations, hotels, transportations)
+        
+        # Perubahan aktivitas memengaruhi semua triple, perubahan item wajib hanya triple yang memuatnya
+        if knapsack_mode != "dipakai ulang":
+            fresh = list(self.triples)
+        self._evaluate(fresh)
+        
+        self.best_plan, self.max_value = self._best(destinations, hotels, transportations)
+        self.snapshot = {item_type: {name: (data["cost"], data["value"], item_availability(data))
+                                     for name, data in items.items()}
+                         for item_type, items in categories.items()}
+        for names in self.stale.values():
+            names.clear()
+        self.last_update = {"mode": "penuh" if full else "inkremental", "triples_updated": len(fresh),
+                            "triples_total": len(self.triples), "knapsack": knapsack_mode}
+        return self.best_plan, self.max_value
+    
+    def _diff(self, item_type, items, full):
+        previous = self.snapshot[item_type]
+        if full:
+            return set(items)
+        changed = {name for name in previous if name not in items}
+        for name, data in items.items():
+            if previous.get(name) != (data["cost"], data["value"], item_availability(data)):
+                changed.add(name)
+        return changed | {name for name in self.stale[item_type] if name in items or name in previous}
+    
+    def _update_triples(self, changed, destinations, hotels, transportations):
+        mandatory = (destinations, hotels, transportations)
+        previous = [self.snapshot[item_type] for item_type in MANDATORY_TYPES]
+        touched = [changed[item_type] for item_type in MANDATORY_TYPES]
+        
+        # Hanya triple yang memuat item yang berubah yang dibuang lalu dihitung ulang
+        for position, names in enumerate(touched):
+            for name in names:
+                if name not in previous[position]:
                     continue
-                    
-                activity_cost = activities[activity]["cost"]
-                activity_value = activities[activity]["value"]
-                
-                # Check if adding this would exceed budget
-                if current_cost + activity_cost <= self.total_budget:
-                    selected.append(("activity", activity, activity_cost, activity_value))
-                    self.backtrack(destinations, hotels, transportations, activities, 
-                                   selected, current_cost + activity_cost, current_value + activity_value)
-                    selected.pop()
+                for key in self._triples_with(previous, position, name):
+                    if self.triples.pop(key, None) is not None:
+                        del self.totals[key]
+        
+        fresh = []
+        for position, names in enumerate(touched):
+            for name in names:
+                if name not in mandatory[position]:
+                    continue
+                for key in self._triples_with(mandatory, position, name):
+                    if key in self.triples:
+                        continue
+                    if not (available_at(hotels[key[1]], key[0]) and available_at(transportations[key[2]], key[0])):
+                        continue
+                    cost = sum(mandatory[i][key[i]]["cost"] for i in range(3))
+                    if cost <= self.budget:
+                        self.triples[key] = (cost, sum(mandatory[i][key[i]]["value"] for i in range(3)))
+                        fresh.append(key)
+        return fresh
+    
+    @staticmethod
+    def _triples_with(categories, position, name):
+        choices = [list(items) for items in categories]
+        choices[position] = [name]
+        for dest in choices[0]:
+            for hotel in choices[1]:
+                for transport in choices[2]:
+                    yield dest, hotel, transport
+    
+    def _evaluate(self, keys):
+        if not keys:
+            return
+        costs = np.array([self.triples[key][0] for key in keys], dtype=np.int64)
+        values = np.array([self.triples[key][1] for key in keys], dtype=np.int64)
+        totals = values + self.knapsack.best_values(self.budget - costs)
+        self.totals.update(zip(keys, totals.tolist()))
+    
+    def _best(self, destinations, hotels, transportations):
+        max_value = max(self.totals.values(), default=0)
+        if max_value <= 0:
+            return None, 0
+        
+        # Seri dimenangkan triple yang paling awal di katalog, seperti pencarian serial
+        positions = [{name: i for i, name in enumerate(items)} for items in (destinations, hotels, transportations)]
+        key = min((k for k, total in self.totals.items() if total == max_value),
+                  key=lambda k: (positions[0][k[0]], positions[1][k[1]], positions[2][k[2]]))
+        
+        dest, hotel, transport = key
+        plan = mandatory_items(dest, hotel, transport, destinations, hotels, transportations)
+        _, chosen = self.knapsack.best_selection(self.budget - self.triples[key][0])
+        for index in chosen:
+            plan.append(("activity", self.knapsack.names[index], self.knapsack.costs[index],
+                         self.knapsack.values[index]))
+        return plan, max_value
+
+
+# State bersama untuk re-plan dari menu utama setelah katalog diedit
+INCREMENTAL_STATE = IncrementalPlanState()
+
+
+class IncrementalPlanner:
+    """Engine wrapper that answers from the shared IncrementalPlanState."""
+    label = "Inkremental (re-plan cepat)"
+    
+    def __init__(self, budget, state=None):
+        self.best_plan = None
+        self.max_value = 0
+        self.total_budget = budget
+        self.state = INCREMENTAL_STATE if state is None else state
+    
+    def plan_trip_to_china(self, destinations, hotels, transportations, activities):
+        """Plan an optimal trip; same arguments and result as TravelPlanner."""
+        plan, value = self.state.plan(self.total_budget, destinations, hotels, transportations, activities)
+        if value > self.max_value:
+            self.max_value = value
+            self.best_plan = plan
+        return self.best_plan
+
+
+# Mesin solver yang bisa dipilih dari menu / run_backtracking_algorithm
+SOLVER_ENGINES = {
+    "backtracking": TravelPlanner,
+    "branch_and_bound": BranchAndBoundPlanner,
+    "parallel": ParallelPlanner,
+    "memoized": MemoizedPlanner,
+    "top_k": TopKPlanner,
+    "anytime": AnytimePlanner,
+    "dp": DynamicProgrammingPlanner,
+    "meet_in_the_middle": MeetInTheMiddlePlanner,
+    "incremental": IncrementalPlanner,
+}
+
+
+class CatalogStore:
+    """
+    Persistent catalog in an SQLite file.
+    
+    Every item is one row of ``items`` (category, name, cost, value), with
+    an index on (category, cost), so a category loads with one indexed
+    query and ``load(max_cost=budget)`` skips items that can never fit.
+    Catalog order is the row id, which an edit keeps, just like updating a
+    dict entry. add/edit/delete from manage_items are single-row writes.
+    Destination restrictions are stored as a JSON list (NULL = everywhere).
+    """
+    
+    def __init__(self, path=CATALOG_DB_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    category TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    cost INTEGER NOT NULL,
+                    value INTEGER NOT NULL,
+                    destinations TEXT,
+                    UNIQUE (category, name)
+                );
+                CREATE INDEX IF NOT EXISTS items_category_cost ON items (category, cost);
+                CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """)
+            # Berkas dari versi sebelum ada batasan kompatibilitas
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(items)")]
+            if "destinations" not in columns:
+                self.connection.execute("ALTER TABLE items ADD COLUMN destinations TEXT")
+    
+    def close(self):
+        self.connection.close()
+    
+    def load(self, max_cost=None):
+        """Return ``(destinations, hotels, transportations, activities)`` dicts in catalog order."""
+        catalog = []
+        for item_type in SEARCH_STAGES:
+            if max_cost is None:
+                rows = self.connection.execute(
+                    "SELECT name, cost, value, destinations FROM items WHERE category = ? ORDER BY id", (item_type,))
+            else:
+                rows = self.connection.execute(
+                    "SELECT name, cost, value, destinations FROM items WHERE category = ? AND cost <= ? ORDER BY id",
+                    (item_type, max_cost))
             
-            # Also consider the possibility of not adding any more activities
-            if current_value > self.max_value:
-                self.max_value = current_value
-                self.best_plan = selected.copy()
+            items = {}
+            for name, cost, value, allowed in rows:
+                items[name] = {"cost": cost, "value": value}
+                if allowed is not None:
+                    items[name]["destinations"] = json.loads(allowed)
+            catalog.append(items)
+        return tuple(catalog)
+    
+    def count(self):
+        """Return the number of stored items per category."""
+        counts = dict.fromkeys(SEARCH_STAGES, 0)
+        counts.update(self.connection.execute("SELECT category, COUNT(*) FROM items GROUP BY category"))
+        return counts
+    
+    def save_item(self, item_type, name, cost, value, destinations=None):
+        """Insert or update one item (an edit keeps the item's position)."""
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO items (category, name, cost, value, destinations) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (category, name) DO UPDATE SET cost = excluded.cost, value = excluded.value, "
+                "destinations = excluded.destinations",
+                (item_type, name, cost, value, json.dumps(destinations) if destinations else None))
+    
+    def delete_item(self, item_type, name):
+        with self.connection:
+            self.connection.execute("DELETE FROM items WHERE category = ? AND name = ?", (item_type, name))
+    
+    def has_item(self, item_type, name):
+        return self.connection.execute("SELECT 1 FROM items WHERE category = ? AND name = ?",
+                                       (item_type, name)).fetchone() is not None
+    
+    def sync_item(self, item_type, name, data):
+        """Write the current state of one item: ``data`` is its dict entry, or None if it was deleted."""
+        if data is None:
+            self.delete_item(item_type, name)
+        else:
+            self.save_item(item_type, name, data["cost"], data["value"], data.get("destinations"))
+    
+    def replace_all(self, destinations, hotels, transportations, activities):
+        """Replace the whole catalog in one transaction (e.g. when loading default_data)."""
+        with self.connection:
+            self.connection.execute("DELETE FROM items")
+            self.connection.executemany(
+                "INSERT INTO items (category, name, cost, value, destinations) VALUES (?, ?, ?, ?, ?)",
+                ((item_type, name, data["cost"], data["value"],
+                  json.dumps(data["destinations"]) if data.get("destinations") else None)
+                 for item_type, items in zip(SEARCH_STAGES, (destinations, hotels, transportations, activities))
+                 for name, data in items.items()))
+    
+    def get_budget(self):
+        row = self.connection.execute("SELECT value FROM settings WHERE key = 'budget'").fetchone()
+        return None if row is None else row[0]
+    
+    def set_budget(self, budget):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('budget', ?)", (budget,))
+
+
+def open_catalog_store(path=CATALOG_DB_PATH):
+    """Open the catalog store, or return None (with a warning) if the file cannot be used."""
+    try:
+        return CatalogStore(path)
+    except (sqlite3.Error, OSError) as e:
+        print(f"{Fore.RED}✗ Katalog tersimpan tidak dapat dibuka ({e}); data tidak akan disimpan.")
+        return None
+
+
+def load_store_catalog(store, budget=None):
+    """
+    Load the stored items that fit ``budget`` (all items when None) for the
+    menu. Returns ``(catalog, hidden)`` where ``hidden`` counts the items
+    left on disk because they cost more than the budget.
+    """
+    catalog = store.load(max_cost=budget)
+    hidden = sum(store.count().values()) - sum(len(items) for items in catalog)
+    return catalog, hidden
+
+
+def hidden_item_check(store, item_type, items):
+    """
+    is_hidden callback for manage_items: True if ``name`` is stored but was
+    not loaded into ``items`` because it costs more than the budget.
+    """
+    def is_hidden(name):
+        return store is not None and name not in items and store.has_item(item_type, name)
+    return is_hidden
+
+
+def catalog_change_handler(store, item_type, items):
+    """on_change callback for manage_items: mark the incremental plan stale and write the one changed row."""
+    def on_change(name):
+        INCREMENTAL_STATE.mark_stale(item_type, name)
+        if store is not None:
+            store.sync_item(item_type, name, items.get(name))
+    return on_change
 
 
 def clear_screen():
@@ -136,15 +2088,6 @@ def print_china_ascii_art():
     print(china_ascii)
 
 
-def loading_animation(text, duration=3):
-    """Display a simple loading animation."""
-    for _ in range(duration):
-        for c in ["|", "/", "-", "\\"]:
-            print(f"\r{Fore.CYAN}{text} {c}", end="")
-            time.sleep(0.2)
-    print("\r" + " " * (len(text) + 2), end="\r")
-
-
 def input_number(prompt):
     """Helper function untuk memvalidasi input angka dengan styling."""
     print(Fore.YELLOW + prompt, end="")
@@ -193,6 +2136,18 @@ def input_item(item_type):
     return name, cost, value
 
 
+def input_availability(name, previous=None):
+    """Ask which destinations an item is available at; returns a list, or None for everywhere."""
+    hint = ", ".join(previous) if previous else "semua"
+    answer = input(f"{Fore.YELLOW}Destinasi tempat {name} tersedia, pisahkan dengan koma "
+                   f"(kosong = {hint}, '*' = semua): ").strip()
+    if not answer:
+        return previous
+    if answer == "*":
+        return None
+    return [dest.strip() for dest in answer.split(",") if dest.strip()] or None
+
+
 def view_items(items, item_type, color=Fore.WHITE):
     """View all items of a specific type."""
     if not items:
@@ -203,13 +2158,23 @@ def view_items(items, item_type, color=Fore.WHITE):
     print_subtitle(f"Daftar {item_type.capitalize()}")
     
     for i, (name, data) in enumerate(items.items(), 1):
-        print(f"{color}{i}. {Fore.WHITE}{name} - {Fore.GREEN}{data['cost']:,} IDR, {Fore.YELLOW}Nilai: {data['value']}%")
+        allowed = data.get("destinations")
+        restriction = f" {Fore.CYAN}(hanya di: {', '.join(allowed)})" if allowed else ""
+        print(f"{color}{i}. {Fore.WHITE}{name} - {Fore.GREEN}{data['cost']:,} IDR, {Fore.YELLOW}Nilai: {data['value']}%"
+              f"{restriction}")
     
     input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali...")
 
 
-def manage_items(items, item_type, color):
-    """Menu to manage (add, view, edit, delete) items of a specific type."""
+def manage_items(items, item_type, color, on_change=None, restrictable=False, is_hidden=None):
+    """
+    Menu to manage (add, view, edit, delete) items of a specific type.
+    
+    ``on_change(name)`` is called after every add, edit or delete. With
+    ``restrictable`` the user can also tie an item to specific destinations.
+    ``is_hidden(name)`` reports names taken by stored items that are not
+    shown; adding an item with such a name is refused.
+    """
     while True:
         choice = display_menu(f"KELOLA {item_type.upper()}", [
             f"Tambah {item_type} baru",
@@ -227,8 +2192,18 @@ def manage_items(items, item_type, color):
             print_title(f"TAMBAH {item_type.upper()}")
             
             name, cost, value = input_item(item_type)
-            if name:
+            if name and is_hidden and is_hidden(name):
+                # Jangan menimpa item tersimpan yang tidak dimuat karena melebihi budget
+                print(f"\n{Fore.RED}✗ {item_type.capitalize()} '{name}' sudah tersimpan tetapi melebihi budget saat ini. "
+                      f"Naikkan budget untuk mengeditnya, atau gunakan nama lain.")
+                input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali...")
+            elif name:
                 items[name] = {"cost": cost, "value": value}
+                allowed = input_availability(name) if restrictable else None
+                if allowed:
+                    items[name]["destinations"] = allowed
+                if on_change:
+                    on_change(name)
                 print(f"\n{Fore.GREEN}✓ {item_type.capitalize()} '{name}' berhasil ditambahkan!")
                 time.sleep(1)
         
@@ -268,7 +2243,12 @@ def manage_items(items, item_type, color):
                 print(Fore.RED + "✗ Nilai kepuasan harus antara 1-100")
                 value = input_number(f"Nilai kepuasan baru (sebelumnya: {items[name]['value']}%)")
             
+            allowed = input_availability(name, items[name].get("destinations")) if restrictable else None
             items[name] = {"cost": cost, "value": value}
+            if allowed:
+                items[name]["destinations"] = allowed
+            if on_change:
+                on_change(name)
             print(f"\n{Fore.GREEN}✓ {item_type.capitalize()} '{name}' berhasil diperbarui!")
             time.sleep(1)
         
@@ -297,12 +2277,19 @@ def manage_items(items, item_type, color):
             
             if confirm == 'y':
                 del items[name]
+                if on_change:
+                    on_change(name)
                 print(f"\n{Fore.GREEN}✓ {item_type.capitalize()} '{name}' berhasil dihapus!")
                 time.sleep(1)
 
 
-def print_plan_result(optimal_plan, budget, max_value):
-    """Display the optimal travel plan with improved formatting."""
+def print_plan_result(optimal_plan, budget, max_value, ranked_plans=None):
+    """
+    Display the optimal travel plan with improved formatting.
+    
+    ``ranked_plans`` is an optional list of ``(value, plan)`` (e.g. from
+    TravelPlanner.ranked_plans()) shown as a ranking after the summary.
+    """
     if not optimal_plan:
         print(Fore.RED + "\n❌ Tidak dapat menemukan rencana perjalanan yang sesuai dengan budget.")
         print(Fore.RED + "   Coba tingkatkan budget atau kurangi biaya komponen perjalanan.")
@@ -314,44 +2301,27 @@ def print_plan_result(optimal_plan, budget, max_value):
     
     print(Fore.WHITE + f"💰 Budget Total: {Fore.GREEN}{budget:,} IDR")
     
-    total_cost = 0
-    
-    # Group items by type
-    destinations = []
-    hotels = []
-    transportations = []
-    activities = []
-    
-    for item_type, item_name, cost, value in optimal_plan:
-        total_cost += cost
-        if item_type == "destination":
-            destinations.append((item_name, cost, value))
-        elif item_type == "hotel":
-            hotels.append((item_name, cost, value))
-        elif item_type == "transportation":
-            transportations.append((item_name, cost, value))
-        else:
-            activities.append((item_name, cost, value))
+    groups, total_cost = group_plan(optimal_plan)
     
     # Print destinations
     print(f"\n{Fore.YELLOW}🏙️ {Style.BRIGHT}Destinasi:")
-    for name, cost, value in destinations:
+    for name, cost, value in groups["destination"]:
         print(f"  {Fore.WHITE}• {name} - {Fore.GREEN}{cost:,} IDR {Fore.YELLOW}({value}% nilai)")
     
     # Print hotels
     print(f"\n{Fore.BLUE}🏨 {Style.BRIGHT}Hotel:")
-    for name, cost, value in hotels:
+    for name, cost, value in groups["hotel"]:
         print(f"  {Fore.WHITE}• {name} - {Fore.GREEN}{cost:,} IDR {Fore.YELLOW}({value}% nilai)")
     
     # Print transportation
     print(f"\n{Fore.MAGENTA}✈️ {Style.BRIGHT}Transportasi:")
-    for name, cost, value in transportations:
+    for name, cost, value in groups["transportation"]:
         print(f"  {Fore.WHITE}• {name} - {Fore.GREEN}{cost:,} IDR {Fore.YELLOW}({value}% nilai)")
     
     # Print activities if any
-    if activities:
+    if groups["activity"]:
         print(f"\n{Fore.CYAN}🎭 {Style.BRIGHT}Aktivitas:")
-        for name, cost, value in activities:
+        for name, cost, value in groups["activity"]:
             print(f"  {Fore.WHITE}• {name} - {Fore.GREEN}{cost:,} IDR {Fore.YELLOW}({value}% nilai)")
     
     # Print summary
@@ -360,87 +2330,346 @@ def print_plan_result(optimal_plan, budget, max_value):
     remaining = budget - total_cost
     print(f"{Fore.WHITE}💵 Sisa Budget: {Fore.GREEN if remaining >= 0 else Fore.RED}{remaining:,} IDR")
     print(f"{Fore.WHITE}⭐ Skor Nilai Perjalanan: {Fore.YELLOW}{max_value}")
+    
+    # Print ranked alternatives if any
+    if ranked_plans:
+        print(f"\n{Fore.CYAN}🏆 {Style.BRIGHT}Peringkat Rencana:")
+        for rank, (value, plan) in enumerate(ranked_plans, 1):
+            cost = sum(item[2] for item in plan)
+            names = ", ".join(item[1] for item in plan)
+            print(f"  {Fore.YELLOW}{rank}. {Fore.WHITE}{names} - {Fore.GREEN}{cost:,} IDR {Fore.YELLOW}(skor {value})")
     return True
 
 
-def save_result_to_file(optimal_plan, budget, max_value, filename="rencana_perjalanan.txt"):
-    """Save the travel plan result to a text file."""
+def save_result_to_file(optimal_plan, budget, max_value, filename="rencana_perjalanan.txt", ranked_plans=None):
+    """Save the travel plan result (and optional ranked alternatives) to a text file."""
     if not optimal_plan:
         return False
     
     try:
-        with open(filename, "w") as f:
-            f.write("=" * 60 + "\n")
-            f.write("RENCANA PERJALANAN OPTIMAL KE CHINA\n")
-            f.write("=" * 60 + "\n\n")
-            
-            f.write(f"Budget Total: {budget:,} IDR\n\n")
-            
-            total_cost = 0
-            
-            # Group items by type
-            destinations = []
-            hotels = []
-            transportations = []
-            activities = []
-            
-            for item_type, item_name, cost, value in optimal_plan:
-                total_cost += cost
-                if item_type == "destination":
-                    destinations.append((item_name, cost, value))
-                elif item_type == "hotel":
-                    hotels.append((item_name, cost, value))
-                elif item_type == "transportation":
-                    transportations.append((item_name, cost, value))
-                else:
-                    activities.append((item_name, cost, value))
-            
-            # Write destinations
-            f.write("DESTINASI:\n")
-            for name, cost, value in destinations:
-                f.write(f"  • {name} - {cost:,} IDR ({value}% nilai)\n")
-            
-            # Write hotels
-            f.write("\nHOTEL:\n")
-            for name, cost, value in hotels:
-                f.write(f"  • {name} - {cost:,} IDR ({value}% nilai)\n")
-            
-            # Write transportation
-            f.write("\nTRANSPORTASI:\n")
-            for name, cost, value in transportations:
-                f.write(f"  • {name} - {cost:,} IDR ({value}% nilai)\n")
-            
-            # Write activities if any
-            if activities:
-                f.write("\nAKTIVITAS:\n")
-                for name, cost, value in activities:
-                    f.write(f"  • {name} - {cost:,} IDR ({value}% nilai)\n")
-            
-            # Write summary
-            f.write("\n" + "-" * 60 + "\n")
-            f.write(f"Total Biaya: {total_cost:,} IDR\n")
-            remaining = budget - total_cost
-            f.write(f"Sisa Budget: {remaining:,} IDR\n")
-            f.write(f"Skor Nilai Perjalanan: {max_value}\n")
-            f.write("\n" + "=" * 60 + "\n")
-            f.write("Dibuat dengan Program Perencanaan Perjalanan Ke China\n")
-            f.write("Menggunakan Algoritma Backtracking\n")
-            
+        with PlanWriter(filename) as writer:
+            writer.write(optimal_plan, budget, max_value, ranked_plans)
         return True
-    except:
+    except OSError:
         return False
 
 
-def run_backtracking_algorithm(budget, destinations, hotels, transportations, activities):
-    """Run the backtracking algorithm with animation."""
-    loading_animation("🧮 Menjalankan algoritma backtracking untuk optimasi perjalanan...", 3)
+PLAN_SECTIONS = (("destination", "DESTINASI"), ("hotel", "HOTEL"), ("transportation", "TRANSPORTASI"),
+                 ("activity", "AKTIVITAS"))
+PLAN_EXPORT_FORMATS = ("text", "jsonl", "csv")
+PLAN_CSV_FIELDS = ("plan", "budget", "engine", "max_value", "total_cost", "type", "name", "cost", "value")
+PLAN_WRITER_BUFFER = 1 << 16
+
+
+def group_plan(plan):
+    """Return ``({item_type: [(name, cost, value), ...]}, total_cost)`` for one plan."""
+    groups = {item_type: [] for item_type, _ in PLAN_SECTIONS}
+    total_cost = 0
+    for item_type, item_name, cost, value in plan or []:
+        total_cost += cost
+        groups[item_type if item_type in groups else "activity"].append((item_name, cost, value))
+    return groups, total_cost
+
+
+def plan_record(optimal_plan, budget, max_value, engine):
+    """Describe one optimization result as a JSON-serializable dict."""
+    plan = optimal_plan or []
+    total_cost = sum(item[2] for item in plan)
+    return {
+        "budget": budget,
+        "engine": engine,
+        "found": bool(optimal_plan),
+        "max_value": max_value,
+        "total_cost": total_cost,
+        "remaining_budget": budget - total_cost,
+        "plan": [{"type": item_type, "name": name, "cost": cost, "value": value}
+                 for item_type, name, cost, value in plan],
+    }
+
+
+class PlanWriter:
+    """
+    Streaming export of many plans into one file or stream.
+    
+    The file is opened once with a large buffer and every ``write`` appends
+    one plan in the chosen format: ``text`` (the report of
+    save_result_to_file), ``jsonl`` (one plan_record per line) or ``csv``
+    (one row per plan item, header written once, plans numbered from 1 per
+    writer). Use it as a context manager so the buffer is flushed and the
+    file closed.
+    """
+    
+    def __init__(self, target, export_format="text", append=False):
+        if export_format not in PLAN_EXPORT_FORMATS:
+            raise ValueError(f"Format ekspor tidak dikenal: {export_format}")
+        self.export_format = export_format
+        self.count = 0
+        self.owns_stream = isinstance(target, (str, os.PathLike))
+        if self.owns_stream:
+            # csv.writer menulis akhir baris sendiri; format lain memakai akhir baris bawaan OS
+            self.stream = open(target, "a" if append else "w", encoding="utf-8",
+                               newline="" if export_format == "csv" else None, buffering=PLAN_WRITER_BUFFER)
+        else:
+            self.stream = target
+        
+        self.csv_writer = None
+        if export_format == "csv":
+            self.csv_writer = csv.writer(self.stream)
+            # Header hanya untuk berkas yang masih kosong
+            if not (self.owns_stream and append and self.stream.tell() > 0):
+                self.csv_writer.writerow(PLAN_CSV_FIELDS)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        if self.owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+    
+    def write(self, optimal_plan, budget, max_value, ranked_plans=None, engine=None):
+        """Append one plan (``None`` for "no plan found")."""
+        self.count += 1
+        if self.export_format == "jsonl":
+            record = plan_record(optimal_plan, budget, max_value, engine)
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif self.export_format == "csv":
+            self._write_csv(optimal_plan, budget, max_value, engine)
+        else:
+            self._write_text(optimal_plan, budget, max_value, ranked_plans)
+    
+    def write_error(self, source, message):
+        """Report a failed input: a JSON line in jsonl mode, otherwise on stderr."""
+        if self.export_format == "jsonl":
+            self.stream.write(json.dumps({"input": source, "error": message}, ensure_ascii=False) + "\n")
+        else:
+            print(f"{source}: {message}", file=sys.stderr)
+    
+    def _write_csv(self, optimal_plan, budget, max_value, engine):
+        _, total_cost = group_plan(optimal_plan)
+        summary = (self.count, budget, engine or "", max_value, total_cost)
+        if not optimal_plan:
+            self.csv_writer.writerow(summary + ("", "", "", ""))
+        self.csv_writer.writerows(summary + tuple(item) for item in optimal_plan or [])
+    
+    def _write_text(self, optimal_plan, budget, max_value, ranked_plans):
+        write = self.stream.write
+        groups, total_cost = group_plan(optimal_plan)
+        
+        write("=" * 60 + "\n")
+        write("RENCANA PERJALANAN OPTIMAL KE CHINA\n")
+        write("=" * 60 + "\n\n")
+        write(f"Budget Total: {budget:,} IDR\n\n")
+        
+        if not optimal_plan:
+            write("Tidak ada rencana perjalanan yang sesuai dengan budget.\n")
+        else:
+            for position, (item_type, title) in enumerate(PLAN_SECTIONS):
+                # Aktivitas bersifat opsional, bagian kosong tidak ditulis
+                if item_type == "activity" and not groups[item_type]:
+                    continue
+                write(("\n" if position else "") + f"{title}:\n")
+                for name, cost, value in groups[item_type]:
+                    write(f"  • {name} - {cost:,} IDR ({value}% nilai)\n")
+            
+            write("\n" + "-" * 60 + "\n")
+            write(f"Total Biaya: {total_cost:,} IDR\n")
+            write(f"Sisa Budget: {budget - total_cost:,} IDR\n")
+            write(f"Skor Nilai Perjalanan: {max_value}\n")
+            
+            if ranked_plans:
+                write("\nPERINGKAT RENCANA:\n")
+                for rank, (value, plan) in enumerate(ranked_plans, 1):
+                    cost = sum(item[2] for item in plan)
+                    names = ", ".join(item[1] for item in plan)
+                    write(f"  {rank}. {names} - {cost:,} IDR (skor {value})\n")
+        
+        write("\n" + "=" * 60 + "\n")
+        write("Dibuat dengan Program Perencanaan Perjalanan Ke China\n")
+        write("Menggunakan Algoritma Backtracking\n")
+
+
+def build_planner(budget, destinations, hotels, transportations, activities, engine="backtracking",
+                  on_improve=None):
+    """
+    Preprocess the catalog and create the solver engine for it. Returns
+    ``(planner, catalog, preprocess_report)``; the search itself is
+    ``planner.plan_trip_to_china(*catalog)``.
+    """
+    planner = SOLVER_ENGINES[engine](budget)
+    
+    # Buang item yang tidak mungkin masuk rencana optimal sebelum pencarian
+    catalog, report = preprocess_catalog(budget, destinations, hotels, transportations, activities,
+                                         dominance=not getattr(planner, "top_k", None))
+    if getattr(planner, "activity_cache", None) is not None:
+        # Versi cache mengikuti katalog aktivitas asli, bukan hasil praproses yang bergantung budget
+        catalog = catalog[:3] + (activities,)
+    if getattr(planner, "state", None) is not None:
+        # State inkremental membandingkan dengan katalog asli agar hanya item yang diedit yang dihitung ulang
+        catalog = (destinations, hotels, transportations, activities)
+    if on_improve is not None and getattr(planner, "limited", False):
+        planner.on_improve = on_improve
+    return planner, catalog, report
+
+
+def solve_catalog(budget, destinations, hotels, transportations, activities, engine="backtracking",
+                  on_improve=None):
+    """
+    Preprocess the catalog and run one solver engine on it, without any
+    screen output. Returns ``(planner, optimal_plan, preprocess_report)``.
+    """
+    planner, catalog, report = build_planner(budget, destinations, hotels, transportations, activities, engine,
+                                             on_improve)
+    optimal_plan = planner.plan_trip_to_china(*catalog)
+    return planner, optimal_plan, report
+
+
+class KeyListener:
+    """
+    Non-blocking single-key reads from the terminal, as a context manager.
+    
+    On POSIX the terminal is put in cbreak mode for the duration of the
+    block; when stdin is not a terminal ``pressed`` always returns None.
+    """
+    
+    def __enter__(self):
+        self.saved = None
+        if msvcrt is None and sys.stdin.isatty():
+            self.saved = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.saved is not None:
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.saved)
+    
+    def pressed(self):
+        """Return the key pressed since the last call, or None."""
+        if msvcrt is not None:
+            return msvcrt.getwch() if msvcrt.kbhit() else None
+        if self.saved is None:
+            return None
+        ready, _, _ = select.select([sys.stdin], [], [], 0)
+        return sys.stdin.read(1) if ready else None
+
+
+class SolverThread(threading.Thread):
+    """Run one planner's search in the background; ``result`` / ``error`` hold the outcome."""
+    
+    def __init__(self, planner, catalog):
+        super().__init__(daemon=True)
+        self.planner = planner
+        self.catalog = catalog
+        self.result = None
+        self.error = None
+    
+    def run(self):
+        try:
+            self.result = self.planner.plan_trip_to_china(*self.catalog)
+        except Exception as e:
+            self.error = e
+    
+    def cancel(self):
+        """Ask the search to stop early; False if the engine cannot be cancelled."""
+        cancel = getattr(self.planner, "cancel", None)
+        if cancel is None:
+            return False
+        cancel()
+        return True
+
+
+def run_with_progress(planner, catalog, text, cancel_key="q"):
+    """
+    Run the search in a SolverThread while a spinner shows elapsed time,
+    nodes explored and the best value so far. ``cancel_key`` (or Ctrl+C)
+    stops the search early. Engines without ``cancel`` cannot be stopped,
+    so for them Ctrl+C is re-raised as KeyboardInterrupt. Returns
+    ``(optimal_plan, cancelled)``.
+    """
+    worker = SolverThread(planner, catalog)
+    started = time.perf_counter()
+    worker.start()
     
-    # Jalankan algoritma backtracking
-    planner = TravelPlanner(budget)
-    optimal_plan = planner.plan_trip_to_china(destinations, hotels, transportations, activities)
+    frames = ["|", "/", "-", "\\"]
+    tick = 0
+    cancelled = False
+    line = ""
+    with KeyListener() as keys:
+        while True:
+            try:
+                worker.join(0.1)
+                if not worker.is_alive():
+                    break
+                key = keys.pressed()
+                if not cancelled and key and key.lower() == cancel_key:
+                    cancelled = worker.cancel()
+            except KeyboardInterrupt:
+                cancelled = worker.cancel()
+                if not cancelled:
+                    # Mesin ini tidak bisa dihentikan di tengah jalan: teruskan Ctrl+C ke pemanggil
+                    print()
+                    raise
+            
+            # Dibaca tanpa lock: angka yang sedikit tertinggal tidak masalah untuk tampilan
+            best = max(planner.max_value, getattr(planner, "seed_value", 0))
+            status = f"{time.perf_counter() - started:.1f}s"
+            nodes = getattr(planner, "nodes_visited", None)
+            if nodes is not None:
+                status += f" | {nodes:,} node"
+            status += f" | nilai terbaik {best}"
+            if cancelled:
+                status += " | menghentikan..."
+            elif hasattr(planner, "cancel"):
+                status += f" | tekan '{cancel_key}' untuk berhenti"
+            
+            line = f"{text} {frames[tick % len(frames)]} {status}"
+            print(f"\r{Fore.CYAN}{line}", end="", flush=True)
+            tick += 1
+    
+    if line:
+        print("\r" + " " * (len(line) + 2), end="\r")
+    if worker.error is not None:
+        raise worker.error
+    return worker.result, cancelled
+
+
+def run_backtracking_algorithm(budget, destinations, hotels, transportations, activities, engine="backtracking"):
+    """Run the selected solver engine (backtracking by default) with animation."""
+    planner_class = SOLVER_ENGINES[engine]
+    
+    # Jalankan algoritma optimasi di thread terpisah sambil menampilkan progres
+    planner, catalog, report = build_planner(budget, destinations, hotels, transportations, activities, engine)
+    optimal_plan, cancelled = run_with_progress(
+        planner, catalog, f"🧮 Menjalankan algoritma {planner_class.label} untuk optimasi perjalanan...")
+    ranked_plans = planner.ranked_plans() if getattr(planner, "top_k", None) else None
+    activity_cache = getattr(planner, "activity_cache", None)
+    incremental_state = getattr(planner, "state", None)
+    
+    removed = sum(before - after for before, after in
+                  (report[key] for key in ("destinations", "hotels", "transportations", "activities")))
+    print(f"{Fore.WHITE}🔎 Praproses: {removed} item dibuang, {report['duplicate_activities']} aktivitas duplikat digabung")
+    if activity_cache is not None:
+        print(f"{Fore.WHITE}🗃️ Cache aktivitas: {activity_cache.hits} hit, {activity_cache.misses} miss")
+    if cancelled:
+        print(f"{Fore.YELLOW}⏹️ Dihentikan setelah {getattr(planner, 'nodes_visited', 0):,} node: "
+              f"rencana terbaik sejauh ini")
+    elif getattr(planner, "limited", False):
+        if planner.proven_optimal:
+            print(f"{Fore.GREEN}✓ Rencana terbukti optimal ({planner.nodes_visited:,} node)")
+        else:
+            print(f"{Fore.YELLOW}⏱️ Batas tercapai setelah {planner.nodes_visited:,} node: rencana terbaik sejauh ini, "
+                  f"gap ≤ {planner.optimality_gap():.1%}")
+    if incremental_state is not None:
+        update = incremental_state.last_update
+        print(f"{Fore.WHITE}♻️ Re-plan {update['mode']}: {update['triples_updated']}/{update['triples_total']} "
+              f"triple dihitung ulang, tabel aktivitas {update['knapsack']}")
     
     # Tampilkan hasil
-    if print_plan_result(optimal_plan, budget, planner.max_value):
+    if print_plan_result(optimal_plan, budget, planner.max_value, ranked_plans):
         # Tanya apakah user ingin menyimpan hasil
         save_option = input(f"\n{Fore.YELLOW}Apakah Anda ingin menyimpan rencana perjalanan ini ke file? (y/n) ").lower()
         if save_option == 'y':
@@ -451,7 +2680,7 @@ def run_backtracking_algorithm(budget, destinations, hotels, transportations, ac
             if not filename.endswith('.txt'):
                 filename += '.txt'
                 
-            if save_result_to_file(optimal_plan, budget, planner.max_value, filename):
+            if save_result_to_file(optimal_plan, budget, planner.max_value, filename, ranked_plans):
                 print(f"\n{Fore.GREEN}✓ Rencana perjalanan berhasil disimpan ke '{filename}'!")
             else:
                 print(f"\n{Fore.RED}✗ Gagal menyimpan rencana perjalanan ke file.")
@@ -488,6 +2717,237 @@ def default_data():
     return destinations, hotels, transportations, activities
 
 
+COST_DISTRIBUTIONS = ("uniform", "lognormal", "correlated")
+
+
+def generate_catalog(seed, n_destinations=3, n_hotels=3, n_transportations=3, n_activities=10,
+                     cost_distribution="uniform", compatibility=1.0):
+    """
+    Build a synthetic catalog shaped like default_data().
+    
+    Mandatory items cost 10-40 million IDR and activities 1-10 million IDR,
+    all in steps of 100,000 IDR, with satisfaction values between 1 and 100.
+    ``cost_distribution`` picks how costs are drawn inside that range:
+    "uniform", "lognormal" (many cheap items, a few expensive ones) or
+    "correlated" (value rises with cost, the hardest case for pruning).
+    With ``compatibility`` below 1 every hotel and transportation is tied
+    to that fraction of the destinations (at least one).
+    """
+    if cost_distribution not in COST_DISTRIBUTIONS:
+        raise ValueError(f"Distribusi biaya tidak dikenal: {cost_distribution}")
+    rng = random.Random(seed)
+    
+    def draw(low, high):
+        if cost_distribution == "lognormal":
+            return min(high, int(low * rng.lognormvariate(0, 0.6)) + low // 2)
+        return rng.randint(low, high)
+    
+    def category(prefix, count, low, high):
+        items = {}
+        for i in range(count):
+            units = max(low, draw(low, high))
+            if cost_distribution == "correlated":
+                value = min(100, max(1, round(100 * (units - low) / (high - low)) + rng.randint(-5, 5)))
+            else:
+                value = rng.randint(1, 100)
+            items[f"{prefix} {i + 1}"] = {"cost": units * 100000, "value": value}
+        return items
+    
+    destinations = category("Destinasi", n_destinations, 100, 400)
+    hotels = category("Hotel", n_hotels, 100, 400)
+    transportations = category("Transportasi", n_transportations, 100, 400)
+    activities = category("Aktivitas", n_activities, 10, 100)
+    
+    if compatibility < 1 and destinations:
+        # Generator terpisah agar katalog tanpa batasan tetap sama untuk seed yang sama
+        compatibility_rng = random.Random(f"{seed}-kompatibilitas")
+        names = list(destinations)
+        count = max(1, round(compatibility * len(names)))
+        for items in (hotels, transportations):
+            for data in items.values():
+                data["destinations"] = compatibility_rng.sample(names, count)
+    
+    return destinations, hotels, transportations, activities
+
+
+def benchmark_budget(catalog, budget_ratio):
+    """
+    Budget for a synthetic catalog: the average mandatory triple plus
+    ``budget_ratio`` of the total activity cost (lower is tighter).
+    """
+    destinations, hotels, transportations, activities = catalog
+    mandatory = sum(sum(item["cost"] for item in category.values()) / len(category)
+                    for category in (destinations, hotels, transportations))
+    return int(mandatory + budget_ratio * sum(item["cost"] for item in activities.values()))
+
+
+def crossover_benchmark(activity_counts=range(4, 41, 4), seed=0, budget_ratio=0.5, time_limit=5.0):
+    """
+    Time TravelPlanner against MeetInTheMiddlePlanner on synthetic catalogs
+    of growing activity count.
+    
+    The budget covers the average mandatory triple plus ``budget_ratio`` of
+    the total activity cost. A backtracking run stops after ``time_limit``
+    seconds (``backtracking_interrupted`` is then True and its value is the
+    best found so far) and backtracking is skipped for larger sizes.
+    Returns one dict per size.
+    """
+    rows = []
+    backtracking_enabled = True
+    for count in activity_counts:
+        catalog = generate_catalog(seed, n_activities=count)
+        budget = benchmark_budget(catalog, budget_ratio)
+        
+        row = {"activities": count, "budget": budget}
+        for name, planner_class in (("backtracking", TravelPlanner), ("meet_in_the_middle", MeetInTheMiddlePlanner)):
+            if name == "backtracking" and not backtracking_enabled:
+                row[name] = None
+                continue
+            
+            if name == "backtracking":
+                # Batas dicek di dalam pencarian: tiap ukuran bisa belasan kali lebih lama dari sebelumnya
+                planner = planner_class(budget, time_limit=time_limit)
+            else:
+                planner = planner_class(budget)
+            start = time.perf_counter()
+            planner.plan_trip_to_china(*catalog)
+            elapsed = time.perf_counter() - start
+            row[name] = elapsed
+            row[name + "_value"] = planner.max_value
+            
+            if name == "backtracking":
+                row["backtracking_interrupted"] = planner.interrupted
+                if planner.interrupted:
+                    backtracking_enabled = False
+        rows.append(row)
+    
+    return rows
+
+
+def search_throughput_benchmark(seed=0, n_activities=14, budget_ratio=0.5, repeat=3):
+    """
+    Microbenchmark the recursive and the iterative backtracking engines on
+    one synthetic catalog. Returns nodes per second (best of ``repeat``) for
+    both engines plus the node count, which is identical for the two.
+    """
+    catalog = generate_catalog(seed, n_activities=n_activities)
+    budget = benchmark_budget(catalog, budget_ratio)
+    
+    result = {"activities": n_activities, "budget": budget}
+    for name, iterative in (("recursive", False), ("iterative", True)):
+        best = None
+        for _ in range(repeat):
+            planner = TravelPlanner(budget, iterative=iterative)
+            start = time.perf_counter()
+            planner.plan_trip_to_china(*catalog)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        result["nodes"] = planner.nodes_visited
+        result[name + "_nodes_per_second"] = planner.nodes_visited / best if best else None
+    
+    return result
+
+
+# Skenario standar: (nama, ukuran (destinasi, hotel, transportasi, aktivitas), distribusi biaya, rasio budget)
+BENCHMARK_SCENARIOS = (
+    ("kecil", (3, 3, 3, 10), "uniform", 0.5),
+    ("sedang", (4, 4, 4, 12), "uniform", 0.5),
+    ("budget_ketat", (4, 4, 4, 12), "uniform", 0.2),
+    ("budget_longgar", (4, 4, 4, 12), "uniform", 0.8),
+    ("lognormal", (4, 4, 4, 12), "lognormal", 0.5),
+    ("berkorelasi", (4, 4, 4, 12), "correlated", 0.5),
+)
+BENCHMARK_ENGINES = ("backtracking", "branch_and_bound", "dp")
+
+
+def run_benchmark_suite(scenarios=BENCHMARK_SCENARIOS, engines=BENCHMARK_ENGINES, seed=0, repeat=3,
+                        output=None):
+    """
+    Run every engine on every scenario and return the results as a dict.
+    
+    For each (scenario, engine) pair the wall time is the best of
+    ``repeat`` plain runs, and one extra run under tracemalloc gives the
+    peak memory (tracing slows Python down, so it is kept out of the
+    timing). Nodes visited is None for engines that do not count nodes.
+    With ``output`` the results are also written there as JSON, ready for
+    compare_benchmarks.
+    """
+    results = []
+    for name, sizes, cost_distribution, budget_ratio in scenarios:
+        catalog = generate_catalog(seed, *sizes, cost_distribution=cost_distribution)
+        budget = benchmark_budget(catalog, budget_ratio)
+        
+        for engine in engines:
+            best = None
+            for _ in range(repeat):
+                planner = SOLVER_ENGINES[engine](budget)
+                start = time.perf_counter()
+                planner.plan_trip_to_china(*catalog)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            
+            tracemalloc.start()
+            try:
+                SOLVER_ENGINES[engine](budget).plan_trip_to_china(*catalog)
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            
+            results.append({
+                "scenario": name,
+                "engine": engine,
+                "sizes": list(sizes),
+                "cost_distribution": cost_distribution,
+                "budget_ratio": budget_ratio,
+                "budget": budget,
+                "wall_time": best,
+                "nodes_visited": getattr(planner, "nodes_visited", None),
+                "peak_memory": peak_memory,
+                "max_value": planner.max_value,
+            })
+    
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def compare_benchmarks(baseline, current, tolerance=0.2):
+    """
+    Compare two run_benchmark_suite reports (dicts or JSON file paths).
+    
+    Returns one dict per (scenario, engine) present in both, with the time
+    and memory ratios (current / baseline) and a ``regression`` flag set
+    when the result value changed or a ratio exceeds ``1 + tolerance``.
+    """
+    reports = []
+    for report in (baseline, current):
+        if not isinstance(report, dict):
+            with open(report, encoding="utf-8") as f:
+                report = json.load(f)
+        reports.append({(row["scenario"], row["engine"]): row for row in report["results"]})
+    
+    rows = []
+    for key, old in reports[0].items():
+        new = reports[1].get(key)
+        if new is None:
+            continue
+        time_ratio = new["wall_time"] / old["wall_time"] if old["wall_time"] else None
+        memory_ratio = new["peak_memory"] / old["peak_memory"] if old["peak_memory"] else None
+        regression = (new["max_value"] != old["max_value"]
+                      or any(ratio is not None and ratio > 1 + tolerance for ratio in (time_ratio, memory_ratio)))
+        rows.append({"scenario": key[0], "engine": key[1], "time_ratio": time_ratio, "memory_ratio": memory_ratio,
+                     "value_changed": new["max_value"] != old["max_value"], "regression": regression})
+    return rows
+
+
 def about_program():
     """Display information about the program."""
     clear_screen()
@@ -505,6 +2965,7 @@ def about_program():
     print(f"{Fore.GREEN}  1. Tidak melebihi budget yang ditentukan")
     print(f"{Fore.GREEN}  2. Memaksimalkan nilai kepuasan total")
     print(f"{Fore.GREEN}  3. Memastikan setiap rencana memiliki destinasi, hotel, dan transportasi")
+    print(f"{Fore.GREEN}  4. Hanya memakai hotel dan transportasi yang tersedia di destinasi terpilih")
     
     print(f"\n{Fore.WHITE}Program ini juga memungkinkan Anda untuk:")
     print(f"{Fore.YELLOW}  • Mengelola berbagai opsi perjalanan")
@@ -517,7 +2978,427 @@ def about_program():
     input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...")
 
 
+# Nama kategori pada berkas input headless (JSON/CSV), termasuk alias bahasa Indonesia
+CATALOG_KEYS = ("destinations", "hotels", "transportations", "activities")
+CSV_CATEGORY_ALIASES = {
+    "destination": "destinations", "destinations": "destinations", "destinasi": "destinations",
+    "hotel": "hotels", "hotels": "hotels",
+    "transportation": "transportations", "transportations": "transportations", "transportasi": "transportations",
+    "activity": "activities", "activities": "activities", "aktivitas": "activities",
+}
+
+
+def _coerce_items(items, category):
+    """
+    Normalize one input category to ``{name: {"cost": int, "value": int}}``,
+    keeping an optional ``destinations`` restriction (a list, or in CSV a
+    string separated by ";"). Malformed input raises ValueError.
+    """
+    if isinstance(items, dict):
+        named = []
+        for name, data in items.items():
+            if not isinstance(data, dict):
+                raise ValueError(f"Item {category} tidak valid: {name!r}: {data!r}")
+            named.append(dict(data, name=name))
+        items = named
+    elif not isinstance(items, list):
+        raise ValueError(f"Kategori {category} harus berupa objek atau daftar: {items!r}")
+    
+    result = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError(f"Item {category} tidak valid: {item!r}")
+        try:
+            result[str(item["name"])] = {"cost": int(item["cost"]), "value": int(item["value"])}
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Item {category} tidak valid: {item!r}")
+        
+        allowed = item.get("destinations")
+        if isinstance(allowed, str):
+            allowed = [dest.strip() for dest in allowed.split(";") if dest.strip()]
+        elif allowed is not None and not isinstance(allowed, list):
+            raise ValueError(f"Daftar destinasi item {category} tidak valid: {allowed!r}")
+        if allowed:
+            result[str(item["name"])]["destinations"] = [str(dest) for dest in allowed]
+    return result
+
+
+def catalog_from_json(data):
+    """Return ``(budget, destinations, hotels, transportations, activities)`` from one JSON request."""
+    if not isinstance(data, dict):
+        raise ValueError("Permintaan JSON harus berupa objek")
+    budget = data.get("budget")
+    if budget is not None:
+        try:
+            budget = int(budget)
+        except (TypeError, ValueError):
+            raise ValueError(f"Budget tidak valid: {budget!r}")
+    return (budget,) + tuple(_coerce_items(data.get(key, {}), key) for key in CATALOG_KEYS)
+
+
+def catalog_from_csv(lines):
+    """
+    Return ``(None, destinations, hotels, transportations, activities)``
+    from CSV rows ``category,name,cost,value`` (header required, optional
+    ``destinations`` column).
+    """
+    categories = {key: [] for key in CATALOG_KEYS}
+    for row in csv.DictReader(lines):
+        category = CSV_CATEGORY_ALIASES.get((row.get("category") or "").strip().lower())
+        if category is None:
+            raise ValueError(f"Kategori CSV tidak dikenal: {row.get('category')!r}")
+        categories[category].append(row)
+    return (None,) + tuple(_coerce_items(categories[key], key) for key in CATALOG_KEYS)
+
+
+def read_plan_requests(stream, input_format):
+    """
+    Yield ``(budget, destinations, hotels, transportations, activities)``
+    for every request in ``stream``: one CSV catalog, or JSON given as one
+    object, a list of objects, or one object per line (JSON lines).
+    """
+    if input_format == "csv":
+        yield catalog_from_csv(stream)
+        return
+    
+    text = stream.read()
+    try:
+        documents = [json.loads(text)]
+    except json.JSONDecodeError:
+        documents = [json.loads(line) for line in text.splitlines() if line.strip()]
+    
+    for document in documents:
+        for data in (document if isinstance(document, list) else [document]):
+            yield catalog_from_json(data)
+
+
+def _write_plans(output, budgets, catalog, engine):
+    """
+    Solve one catalog for every budget in ``budgets`` and write the plans.
+    Several budgets with the dp engine (the default for that case) share
+    one knapsack table through plan_for_budgets.
+    """
+    if len(budgets) > 1 and engine in (None, "dp"):
+        for plan_budget, (optimal_plan, max_value) in zip(budgets, plan_for_budgets(budgets, *catalog)):
+            output.write(optimal_plan, plan_budget, max_value, engine="dp")
+        return
+    
+    engine = engine or "backtracking"
+    for plan_budget in budgets:
+        planner, optimal_plan, _ = solve_catalog(plan_budget, *catalog, engine=engine)
+        output.write(optimal_plan, plan_budget, planner.max_value, engine=engine)
+
+
+def run_headless(argv=None):
+    """
+    Command-line entry point: read catalogs from files or stdin, solve them
+    without menus, animations or screen clears, and write one JSON line per
+    plan. Returns the process exit code. The script runs it instead of the
+    menu when it gets arguments or when stdin is not a terminal.
+    """
+    parser = argparse.ArgumentParser(
+        description="Optimasi rencana perjalanan ke China tanpa menu interaktif (output: JSON lines).")
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="berkas katalog .json/.jsonl/.csv ('-' untuk stdin, default)")
+    parser.add_argument("-b", "--budget", type=int, action="append",
+                        help="budget dalam IDR; boleh diulang, menimpa 'budget' di JSON")
+    parser.add_argument("-e", "--engine", choices=list(SOLVER_ENGINES),
+                        help="mesin solver (default: backtracking, atau dp jika --budget diulang)")
+    parser.add_argument("-f", "--format", choices=("json", "csv"),
+                        help="format input (default: dari ekstensi berkas, json untuk stdin)")
+    parser.add_argument("-o", "--output", default="-", help="berkas output ('-' untuk stdout, default)")
+    parser.add_argument("-t", "--output-format", choices=PLAN_EXPORT_FORMATS, default="jsonl",
+                        help="format output (default: jsonl)")
+    parser.add_argument("-a", "--append", action="store_true", help="tambahkan ke berkas output yang sudah ada")
+    parser.add_argument("--db", metavar="BERKAS_DB",
+                        help="ambil katalog dan budget dari penyimpanan katalog SQLite (input diabaikan)")
+    parser.add_argument("--serve", action="store_true", help="jalankan layanan HTTP/JSON di localhost")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help=f"port layanan (default: {SERVICE_PORT})")
+    parser.add_argument("--workers", type=int, help="jumlah proses worker layanan (default: jumlah CPU)")
+    parser.add_argument("--benchmark", metavar="BERKAS_JSON",
+                        help="jalankan suite benchmark dan simpan hasilnya (input diabaikan)")
+    parser.add_argument("--baseline", metavar="BERKAS_JSON",
+                        help="bandingkan hasil --benchmark dengan hasil benchmark sebelumnya")
+    args = parser.parse_args(argv)
+    
+    if args.serve:
+        serve_planning_service(port=args.port, workers=args.workers)
+        return 0
+    if args.benchmark:
+        report = run_benchmark_suite(output=args.benchmark)
+        if not args.baseline:
+            return 0
+        rows = compare_benchmarks(args.baseline, report)
+        for row in rows:
+            print(json.dumps(row))
+        return 1 if any(row["regression"] for row in rows) else 0
+    
+    failures = 0
+    with PlanWriter(sys.stdout if args.output == "-" else args.output, args.output_format, args.append) as output:
+        if args.db:
+            try:
+                store = CatalogStore(args.db)
+            except sqlite3.Error as e:
+                output.write_error(args.db, str(e))
+                return 1
+            try:
+                budgets = args.budget or [store.get_budget()]
+                if budgets[0] is None:
+                    output.write_error(args.db, "Budget tidak diberikan (gunakan --budget atau simpan dari menu)")
+                    return 1
+                # Item yang lebih mahal dari budget terbesar tidak pernah dibaca dari disk
+                catalog = store.load(max_cost=max(budgets))
+                _write_plans(output, budgets, catalog, args.engine)
+            finally:
+                store.close()
+            return 0
+        
+        for path in args.inputs:
+            input_format = args.format or ("csv" if path.lower().endswith(".csv") else "json")
+            stream = None
+            try:
+                stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+                for budget, *catalog in read_plan_requests(stream, input_format):
+                    budgets = args.budget or ([] if budget is None else [budget])
+                    if not budgets:
+                        raise ValueError("Budget tidak diberikan (gunakan --budget atau kunci 'budget')")
+                    _write_plans(output, budgets, catalog, args.engine)
+            except (OSError, ValueError) as e:
+                failures += 1
+                output.write_error(path, str(e))
+            finally:
+                if stream is not None and stream is not sys.stdin:
+                    stream.close()
+    return 1 if failures else 0
+
+
+# Mesin "parallel" membuat pool proses sendiri, tidak bisa dijalankan di dalam worker layanan
+SERVICE_ENGINES = tuple(name for name in SOLVER_ENGINES if name != "parallel")
+
+
+class ServiceBusy(Exception):
+    """Raised by PlanningService.plan when SERVICE_MAX_PENDING solves are already running."""
+
+
+def _ignore_interrupt():
+    # Ctrl+C ditangani oleh proses server, worker cukup dihentikan lewat shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _solve_service_request(budget, catalog, engine):
+    """Worker task of PlanningService: solve one request and return its plan_record."""
+    planner, optimal_plan, _ = solve_catalog(budget, *catalog, engine=engine)
+    return plan_record(optimal_plan, budget, planner.max_value, engine)
+
+
+class PlanningService:
+    """
+    Plan requests on a bounded process pool, with an LRU result cache and
+    coalescing of identical in-flight requests.
+    
+    Requests are keyed by a SHA-256 hash of (engine, budget, catalog) in
+    catalog order, since the order decides ties between equal plans.
+    ``plan`` is thread-safe and is called from the HTTP handler threads.
+    
+    With the "fork" start method the worker processes are all created in
+    __init__, so create the service before starting any other threads
+    (create_planning_server does so before serving).
+    """
+    
+    def __init__(self, workers=None, cache_size=SERVICE_CACHE_SIZE, max_pending=SERVICE_MAX_PENDING):
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_ignore_interrupt)
+        # Tugas pertama membuat semua worker fork sekarang, bukan dari thread handler
+        # HTTP saat thread server lain berjalan (fork dari proses multi-thread bisa deadlock)
+        self.executor.submit(int).result()
+        self.cache_size = cache_size
+        self.max_pending = max_pending
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.started_at = time.perf_counter()
+        self.latencies = deque(maxlen=SERVICE_LATENCY_WINDOW)
+        self.completed_at = deque()
+        self.counters = dict.fromkeys(("requests", "completed", "errors", "rejected", "cache_hits", "cache_misses",
+                                       "coalesced"), 0)
+    
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+    
+    @staticmethod
+    def request_key(budget, catalog, engine):
+        payload = json.dumps([engine, budget, catalog], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def plan(self, budget, catalog, engine="backtracking"):
+        """
+        Return ``(plan_record, source)`` where source is "cache",
+        "coalesced" or "solved". Raises ValueError for an unknown engine
+        and ServiceBusy when the pool is saturated.
+        """
+        if engine not in SERVICE_ENGINES:
+            raise ValueError(f"Mesin solver tidak didukung oleh layanan: {engine}")
+        started = time.perf_counter()
+        key = self.request_key(budget, catalog, engine)
+        
+        with self.lock:
+            self.counters["requests"] += 1
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.counters["cache_hits"] += 1
+                record, source = self.cache[key], "cache"
+            else:
+                self.counters["cache_misses"] += 1
+                future = self.in_flight.get(key)
+                if future is not None:
+                    self.counters["coalesced"] += 1
+                    source = "coalesced"
+                elif len(self.in_flight) >= self.max_pending:
+                    self.counters["rejected"] += 1
+                    raise ServiceBusy("Layanan sedang penuh, coba lagi nanti")
+                else:
+                    future = self.executor.submit(_solve_service_request, budget, catalog, engine)
+                    self.in_flight[key] = future
+                    source = "solved"
+        
+        if source == "solved":
+            # Di luar lock: callback langsung dijalankan di thread ini jika future sudah selesai
+            future.add_done_callback(lambda done: self._finish(key, done))
+        
+        try:
+            if source != "cache":
+                record = future.result()
+        except Exception:
+            with self.lock:
+                self.counters["errors"] += 1
+            raise
+        
+        finished = time.perf_counter()
+        with self.lock:
+            self.counters["completed"] += 1
+            self.latencies.append(finished - started)
+            self.completed_at.append(finished)
+        return record, source
+    
+    def _finish(self, key, future):
+        with self.lock:
+            self.in_flight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self.cache[key] = future.result()
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+    
+    def metrics(self):
+        """Counters, latency percentiles (seconds) and throughput (completed requests per second)."""
+        now = time.perf_counter()
+        with self.lock:
+            while self.completed_at and now - self.completed_at[0] > SERVICE_THROUGHPUT_WINDOW:
+                self.completed_at.popleft()
+            latencies = sorted(self.latencies)
+            window = min(SERVICE_THROUGHPUT_WINDOW, now - self.started_at)
+            metrics = dict(self.counters)
+            metrics.update(in_flight=len(self.in_flight), cache_size=len(self.cache),
+                           uptime=now - self.started_at,
+                           throughput=len(self.completed_at) / window if window > 0 else 0.0)
+        
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else None
+        
+        metrics["latency"] = {
+            "count": len(latencies),
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": latencies[-1] if latencies else None,
+        }
+        return metrics
+
+
+class PlanningRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of PlanningService:
+    
+    - ``POST /plan`` with a catalog_from_json body (plus optional
+      ``"engine"``) returns the plan_record and ``"source"``
+    - ``GET /metrics`` returns PlanningService.metrics()
+    - ``GET /health`` returns ``{"status": "ok"}``
+    """
+    service = None  # Diisi oleh serve_planning_service
+    
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Alamat tidak ditemukan"})
+    
+    def do_POST(self):
+        if self.path != "/plan":
+            self._send_json(404, {"error": "Alamat tidak ditemukan"})
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+            budget, *catalog = catalog_from_json(data)
+            if budget is None:
+                raise ValueError("Budget tidak diberikan")
+            record, source = self.service.plan(budget, catalog, data.get("engine", "backtracking"))
+        except ServiceBusy as e:
+            self._send_json(503, {"error": str(e)})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+        else:
+            self._send_json(200, dict(record, source=source))
+    
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Log per permintaan terlalu mahal saat uji beban; pakai /metrics
+        pass
+
+
+def create_planning_server(host="127.0.0.1", port=SERVICE_PORT, **service_options):
+    """
+    Build (but do not start) the HTTP planning server. Only loopback
+    addresses are accepted. Close ``server.service`` after shutdown.
+    """
+    if host not in LOCAL_HOSTS:
+        raise ValueError(f"Layanan hanya boleh berjalan di localhost, bukan {host}")
+    service = PlanningService(**service_options)
+    handler = type("BoundPlanningRequestHandler", (PlanningRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve_planning_service(host="127.0.0.1", port=SERVICE_PORT, **service_options):
+    """Run the planning service until Ctrl+C."""
+    server = create_planning_server(host, port, **service_options)
+    print(f"Layanan perencanaan berjalan di http://{host}:{server.server_address[1]} (Ctrl+C untuk berhenti)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
 def main():
+    store = None
     try:
         # Initialize variables
         budget = 100000000  # Default budget
@@ -526,6 +3407,17 @@ def main():
         transportations = {}
         activities = {}
         budget_set = False
+        engine = "backtracking"  # Mesin solver default
+        
+        # Muat katalog dan budget yang tersimpan dari sesi sebelumnya
+        store = open_catalog_store()
+        if store is not None:
+            # Hanya item yang muat dalam budget tersimpan yang dibaca dan di-parse
+            stored_budget = store.get_budget()
+            (destinations, hotels, transportations, activities), _ = load_store_catalog(store, stored_budget)
+            if stored_budget is not None:
+                budget = stored_budget
+                budget_set = True
         
         while True:
             main_menu_options = [
@@ -537,12 +3429,15 @@ def main():
                 "Jalankan Optimasi Perjalanan",
                 "Gunakan Data Default",
                 "Tentang Program",
+                f"Pilih Algoritma (Saat ini: {SOLVER_ENGINES[engine].label})",
                 "Keluar"
             ]
             
             # Update first menu item if budget is already set
             if budget_set:
                 main_menu_options[0] = f"Ubah Budget (Saat ini: {budget:,} IDR)"
+            if engine == "incremental" and INCREMENTAL_STATE.is_stale():
+                main_menu_options[5] += " (hasil sebelumnya usang)"
             
             choice = display_menu("PROGRAM PERENCANAAN PERJALANAN KE CHINA", main_menu_options)
             
@@ -554,19 +3449,34 @@ def main():
                 budget = input_number("💰 Masukkan budget perjalanan (dalam Rupiah)")
                 budget_set = True
                 print(f"\n{Fore.GREEN}✓ Budget berhasil diatur: {budget:,} IDR")
+                if store is not None:
+                    store.set_budget(budget)
+                    # Muat ulang agar item yang kini muat (atau tidak lagi muat) ikut berubah
+                    (destinations, hotels, transportations, activities), hidden = load_store_catalog(store, budget)
+                    if hidden:
+                        print(f"{Fore.YELLOW}ℹ {hidden} item tersimpan melebihi budget dan tidak dimuat.")
                 time.sleep(1)
             
             elif choice == 2:  # Manage Destinations
-                destinations = manage_items(destinations, "destinasi", Fore.YELLOW)
+                destinations = manage_items(destinations, "destinasi", Fore.YELLOW,
+                                            catalog_change_handler(store, "destination", destinations),
+                                            is_hidden=hidden_item_check(store, "destination", destinations))
                 
             elif choice == 3:  # Manage Hotels
-                hotels = manage_items(hotels, "hotel", Fore.BLUE)
+                hotels = manage_items(hotels, "hotel", Fore.BLUE,
+                                      catalog_change_handler(store, "hotel", hotels), restrictable=True,
+                                      is_hidden=hidden_item_check(store, "hotel", hotels))
                 
             elif choice == 4:  # Manage Transportation
-                transportations = manage_items(transportations, "transportasi", Fore.MAGENTA)
+                transportations = manage_items(transportations, "transportasi", Fore.MAGENTA,
+                                               catalog_change_handler(store, "transportation", transportations),
+                                               restrictable=True,
+                                               is_hidden=hidden_item_check(store, "transportation", transportations))
                 
             elif choice == 5:  # Manage Activities
-                activities = manage_items(activities, "aktivitas", Fore.CYAN)
+                activities = manage_items(activities, "aktivitas", Fore.CYAN,
+                                          catalog_change_handler(store, "activity", activities),
+                                          is_hidden=hidden_item_check(store, "activity", activities))
                 
             elif choice == 6:  # Run Optimization
                 # Check if we have the required data
@@ -589,7 +3499,7 @@ def main():
                 print_china_ascii_art()
                 print_title("OPTIMASI PERJALANAN")
                 
-                run_backtracking_algorithm(budget, destinations, hotels, transportations, activities)
+                run_backtracking_algorithm(budget, destinations, hotels, transportations, activities, engine)
                 
             elif choice == 7:  # Use Default Data
                 clear_screen()
@@ -599,13 +3509,24 @@ def main():
                 confirm = input(f"{Fore.YELLOW}Apakah Anda yakin ingin menggunakan data default? (y/n) ").lower()
                 if confirm == 'y':
                     destinations, hotels, transportations, activities = default_data()
+                    if store is not None:
+                        store.replace_all(destinations, hotels, transportations, activities)
                     print(f"\n{Fore.GREEN}✓ Data default berhasil dimuat!")
                     time.sleep(1)
             
             elif choice == 8:  # About Program
                 about_program()
                 
-            elif choice == 9 or choice == 0:  # Exit
+            elif choice == 9:  # Choose Solver Engine
+                engine_names = list(SOLVER_ENGINES)
+                engine_choice = display_menu("PILIH ALGORITMA OPTIMASI",
+                                             [SOLVER_ENGINES[name].label for name in engine_names])
+                if engine_choice:
+                    engine = engine_names[engine_choice - 1]
+                    print(f"\n{Fore.GREEN}✓ Algoritma {SOLVER_ENGINES[engine].label} dipilih!")
+                    time.sleep(1)
+            
+            elif choice == 10 or choice == 0:  # Exit
                 clear_screen()
                 print_china_ascii_art()
                 print_title("TERIMA KASIH")
@@ -617,7 +3538,13 @@ def main():
         print(Fore.RED + "\n\nProgram dihentikan oleh pengguna.")
     except Exception as e:
         print(Fore.RED + f"\n\nTerjadi kesalahan: {e}")
+    finally:
+        if store is not None:
+            store.close()
 
 
 if __name__ == "__main__":
+    # Argumen atau input dari pipe/berkas: mode tanpa menu (katalog dibaca dari stdin jika tanpa argumen)
+    if len(sys.argv) > 1 or not sys.stdin.isatty():
+        sys.exit(run_headless())
     main()
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""Tests for the planners and the planning service in "hard quiz alpro.py"."""
+import concurrent.futures
+import importlib.util
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hard quiz alpro.py")
+spec = importlib.util.spec_from_file_location("hard_quiz_alpro", SCRIPT)
+planner_module = importlib.util.module_from_spec(spec)
+# Terdaftar agar fungsi worker bisa di-pickle untuk pool proses
+sys.modules[spec.name] = planner_module
+spec.loader.exec_module(planner_module)
+
+TravelPlanner = planner_module.TravelPlanner
+
+
+def solve(budget, catalog, activity_search):
+    planner = TravelPlanner(budget, activity_search)
+    plan = planner.plan_trip_to_china(*catalog)
+    return planner, plan
+
+
+def plan_cost(plan):
+    return sum(item[2] for item in plan or [])
+
+
+def activity_nodes(activities, room, activity_search):
+    """
+    Activity nodes below one complete triple with ``room`` budget left,
+    counted independently of the planner: every distinct subset (identical
+    activities are interchangeable) in "combination" mode, every ordered
+    sequence in "permutation" mode. Both include the empty selection.
+    """
+    items = [(data["cost"], data["value"]) for data in activities.values()]
+    if activity_search == "combination":
+        subsets = set()
+        for size in range(len(items) + 1):
+            for chosen in itertools.combinations(items, size):
+                if sum(cost for cost, _ in chosen) <= room:
+                    subsets.add(tuple(sorted(chosen)))
+        return len(subsets)
+    return sum(1 for size in range(len(items) + 1) for chosen in itertools.permutations(items, size)
+               if sum(cost for cost, _ in chosen) <= room)
+
+
+def expected_nodes(budget, catalog, activity_search):
+    """Nodes the plain search visits: over-budget mandatory items are visited and then cut."""
+    destinations, hotels, transportations, activities = catalog
+    nodes = 1
+    for dest in destinations.values():
+        nodes += 1
+        if dest["cost"] > budget:
+            continue
+        for hotel in hotels.values():
+            nodes += 1
+            if dest["cost"] + hotel["cost"] > budget:
+                continue
+            for transport in transportations.values():
+                cost = dest["cost"] + hotel["cost"] + transport["cost"]
+                if cost > budget:
+                    nodes += 1
+                else:
+                    nodes += activity_nodes(activities, budget - cost, activity_search)
+    return nodes
+
+
+def random_catalog(rng, restricted=False):
+    """
+    Small catalog with repeated costs and values, so ties and duplicates are
+    common. With ``restricted`` every hotel and transportation is only
+    available at a random subset of the destinations.
+    """
+    def category(prefix, count):
+        return {f"{prefix} {i}": {"cost": rng.randint(1, 6) * 1000000, "value": rng.randint(1, 9)}
+                for i in range(count)}
+
+    catalog = (category("Destinasi", rng.randint(1, 3)), category("Hotel", rng.randint(1, 3)),
+               category("Transportasi", rng.randint(1, 3)), category("Aktivitas", rng.randint(0, 5)))
+    if restricted:
+        names = list(catalog[0])
+        for items in catalog[1:3]:
+            for data in items.values():
+                data["destinations"] = rng.sample(names, rng.randint(1, len(names)))
+    return catalog
+
+
+@pytest.mark.parametrize("budget", [15000000, 40000000, 60000000, 80000000, 120000000])
+def test_modes_agree_on_default_data(budget):
+    catalog = planner_module.default_data()
+    combination, combination_plan = solve(budget, catalog, "combination")
+    permutation, permutation_plan = solve(budget, catalog, "permutation")
+
+    assert combination.max_value == permutation.max_value
+    assert combination_plan == permutation_plan
+    assert plan_cost(combination_plan) <= budget
+    assert combination.nodes_visited == expected_nodes(budget, catalog, "combination")
+    assert permutation.nodes_visited == expected_nodes(budget, catalog, "permutation")
+
+
+def test_modes_agree_on_random_catalogs():
+    rng = random.Random(2024)
+    for _ in range(200):
+        catalog = random_catalog(rng)
+        budget = rng.randint(3, 25) * 1000000
+        combination, combination_plan = solve(budget, catalog, "combination")
+        permutation, permutation_plan = solve(budget, catalog, "permutation")
+
+        assert combination.max_value == permutation.max_value
+        assert combination_plan == permutation_plan
+        assert plan_cost(combination_plan) <= budget
+        assert combination.nodes_visited == expected_nodes(budget, catalog, "combination")
+        assert permutation.nodes_visited == expected_nodes(budget, catalog, "permutation")
+
+
+def test_combination_visits_each_subset_once():
+    # Tanpa batasan budget: 1 triple, lalu setiap himpunan bagian dari n aktivitas tepat satu kali
+    activities = {f"Aktivitas {i}": {"cost": 1000, "value": i + 1} for i in range(6)}
+    catalog = ({"Beijing": {"cost": 1000, "value": 1}}, {"Hotel": {"cost": 1000, "value": 1}},
+               {"Kereta": {"cost": 1000, "value": 1}}, activities)
+    planner, plan = solve(10 ** 9, catalog, "combination")
+
+    assert planner.nodes_visited == 1 + 1 + 1 + 2 ** len(activities)
+    assert planner.max_value == 3 + sum(range(1, 7))
+    assert [item[1] for item in plan[3:]] == list(activities)
+
+
+def test_unknown_search_mode_is_rejected():
+    with pytest.raises(ValueError):
+        TravelPlanner(1000000, "acak")
+
+
+@pytest.mark.parametrize("restricted", [False, True])
+def test_parallel_search_matches_serial(restricted):
+    rng = random.Random(6)
+    for _ in range(15):
+        catalog = random_catalog(rng, restricted)
+        budget = rng.randint(3, 25) * 1000000
+        serial = TravelPlanner(budget)
+        parallel = planner_module.ParallelPlanner(budget, workers=2)
+
+        assert parallel.plan_trip_to_china(*catalog) == serial.plan_trip_to_china(*catalog)
+        assert parallel.max_value == serial.max_value
+
+
+@pytest.mark.parametrize("restricted", [False, True])
+@pytest.mark.parametrize("branch_and_bound", [False, True])
+@pytest.mark.parametrize("activity_search", ["combination", "permutation"])
+def test_iterative_search_matches_recursive(activity_search, branch_and_bound, restricted):
+    rng = random.Random(10)
+    for _ in range(100):
+        catalog = random_catalog(rng, restricted)
+        budget = rng.randint(3, 25) * 1000000
+        recursive = TravelPlanner(budget, activity_search, branch_and_bound=branch_and_bound)
+        iterative = TravelPlanner(budget, activity_search, branch_and_bound=branch_and_bound, iterative=True)
+
+        assert iterative.plan_trip_to_china(*catalog) == recursive.plan_trip_to_china(*catalog)
+        assert iterative.max_value == recursive.max_value
+        assert iterative.nodes_visited == recursive.nodes_visited
+        assert iterative.nodes_pruned == recursive.nodes_pruned
+
+
+@pytest.mark.parametrize("engine", [engine for engine in planner_module.SOLVER_ENGINES
+                                    if engine not in ("parallel", "meet_in_the_middle")])
+def test_preprocessing_keeps_engine_results(engine):
+    rng = random.Random(12)
+    for trial in range(100):
+        catalog = random_catalog(rng, restricted=trial % 2 == 1)
+        budget = rng.randint(3, 25) * 1000000
+        planner_module.ACTIVITY_CACHE.clear()
+        preprocessed, plan, _ = planner_module.solve_catalog(budget, *catalog, engine=engine)
+        planner_module.ACTIVITY_CACHE.clear()
+        raw = planner_module.SOLVER_ENGINES[engine](budget)
+        raw_plan = raw.plan_trip_to_china(*catalog)
+
+        if engine == "top_k":
+            assert preprocessed.ranked_plans() == raw.ranked_plans()
+        else:
+            assert plan == raw_plan
+            assert preprocessed.max_value == raw.max_value
+
+
+def test_preprocessing_keeps_dominated_items_for_top_k():
+    # H2 didominasi H1, tetapi tetap dibutuhkan sebagai rencana terbaik kedua
+    catalog = ({"Beijing": {"cost": 1000, "value": 5}},
+               {"H1": {"cost": 1000, "value": 5}, "H2": {"cost": 2000, "value": 4}},
+               {"Kereta": {"cost": 1000, "value": 5}}, {})
+    planner, _, _ = planner_module.solve_catalog(10000, *catalog, engine="top_k")
+
+    assert [value for value, _ in planner.ranked_plans()] == [15, 14]
+
+
+class FinishedExecutor:
+    """Executor stand-in whose futures are already done when submit returns."""
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, **kwargs):
+        pass
+
+
+def run_in_thread(target, timeout=30):
+    """Run ``target`` in a thread and fail instead of hanging if it does not finish."""
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "PlanningService.plan tidak selesai (deadlock?)"
+
+
+def test_service_coalesces_concurrent_identical_requests():
+    service = planner_module.PlanningService(workers=2)
+    try:
+        catalog = planner_module.default_data()
+        barrier = threading.Barrier(8)
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(service.plan(60000000, catalog))
+
+        threads = [threading.Thread(target=request, daemon=True) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        assert not any(thread.is_alive() for thread in threads)
+
+        sources = [source for _, source in results]
+        assert len(sources) == 8
+        assert sources.count("solved") == 1
+        assert set(sources) <= {"solved", "coalesced", "cache"}
+        assert len({json.dumps(record) for record, _ in results}) == 1
+
+        record, source = service.plan(60000000, catalog)
+        assert source == "cache"
+        assert record == results[0][0]
+
+        metrics = service.metrics()
+        assert metrics["requests"] == 9
+        assert metrics["cache_hits"] + metrics["coalesced"] == 8
+        assert metrics["in_flight"] == 0
+    finally:
+        service.close()
+
+
+def test_service_handles_futures_finished_before_callback():
+    # Future yang sudah selesai menjalankan callback-nya langsung di thread pemanggil
+    service = planner_module.PlanningService(workers=1)
+    service.executor.shutdown()
+    service.executor = FinishedExecutor()
+    catalog = planner_module.default_data()
+    sources = []
+
+    def request():
+        sources.append(service.plan(60000000, catalog)[1])
+        sources.append(service.plan(60000000, catalog)[1])
+
+    run_in_thread(request)
+    assert sources == ["solved", "cache"]
+